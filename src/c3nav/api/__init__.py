@@ -1,15 +1,17 @@
 from functools import wraps
 
+from rest_framework.compat import INDENT_SEPARATORS
 from rest_framework.renderers import JSONRenderer
 
-from c3nav.mapdata.utils.json import json_encoder_reindent
+from c3nav.mapdata.utils.json import json_iterencode_reindent
 
 orig_render = JSONRenderer.render
 
 
 @wraps(JSONRenderer.render)
 def nicer_renderer(self, data, accepted_media_type=None, renderer_context=None):
-    if self.get_indent(accepted_media_type, renderer_context) is None:
+    indent = self.get_indent(accepted_media_type, renderer_context or {})
+    if indent is None or data is None:
         return orig_render(self, data, accepted_media_type, renderer_context)
     shorten_limit = 50
     if isinstance(data, (list, tuple)):
@@ -18,7 +20,9 @@ def nicer_renderer(self, data, accepted_media_type=None, renderer_context=None):
     if shorten:
         remaining_len = len(data)-shorten_limit
         data = data[:shorten_limit]
-    result = json_encoder_reindent(lambda d: orig_render(self, d, accepted_media_type, renderer_context), data)
+    encoder = self.encoder_class(indent=indent, ensure_ascii=self.ensure_ascii, separators=INDENT_SEPARATORS)
+    result = ''.join(json_iterencode_reindent(data, encoder))
+    result = result.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
     if shorten:
         result = (result[:-2] +
                   ('\n    ...%d more elements (truncated for HTML preview)...' % remaining_len).encode() +
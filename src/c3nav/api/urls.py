@@ -11,6 +11,7 @@ from c3nav.editor.api import ChangeSetViewSet, EditorViewSet
 from c3nav.mapdata.api import (AreaViewSet, BuildingViewSet, ColumnViewSet, DoorViewSet, HoleViewSet, LevelViewSet,
                                LineObstacleViewSet, LocationGroupCategoryViewSet, LocationGroupViewSet, LocationViewSet,
                                ObstacleViewSet, POIViewSet, SourceViewSet, SpaceViewSet, StairViewSet)
+from c3nav.routing.api import RoutingViewSet
 
 router = SimpleRouter()
 router.register(r'levels', LevelViewSet)
@@ -33,6 +34,8 @@ router.register(r'locationgroups', LocationGroupViewSet)
 router.register(r'editor', EditorViewSet, base_name='editor')
 router.register(r'changesets', ChangeSetViewSet)
 
+router.register(r'routing', RoutingViewSet, base_name='routing')
+
 
 class APIRoot(GenericAPIView):
     """
@@ -1,5 +1,6 @@
 from itertools import chain
 
+from django.core.cache import cache
 from rest_framework.decorators import detail_route, list_route
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
@@ -8,6 +9,10 @@ from rest_framework.viewsets import ReadOnlyModelViewSet, ViewSet
 from shapely.ops import cascaded_union
 
 from c3nav.editor.models import ChangeSet
+from c3nav.mapdata.models import Building, Door, Hole, Level, LocationGroup, MapUpdate, Space
+from c3nav.mapdata.models.geometry.space import Column
+from c3nav.mapdata.models.locations import LocationGroupCategory
+from c3nav.mapdata.render.geometry import LevelGeometries
 
 
 class EditorViewSet(ViewSet):
@@ -18,25 +23,38 @@ class EditorViewSet(ViewSet):
     /changeset/ returns the current changeset
     """
     @staticmethod
-    def _get_level_geometries(level):
+    def _get_level_geometries(level, use_cache=False):
+        """
+        Get buildings, doors and spaces of a level, with columns and holes cut out.
+        :param use_cache: use the precomputed LevelGeometries, only valid if the level is unmodified
+        """
         buildings = level.buildings.all()
-        buildings_geom = cascaded_union([building.geometry for building in buildings])
         spaces = {space.pk: space for space in level.spaces.all()}
-        holes_geom = []
-        for space in spaces.values():
-            if space.outside:
-                space.geometry = space.geometry.difference(buildings_geom)
-            columns_geom = cascaded_union([column.geometry for column in space.columns.all()])
-            space.geometry = space.geometry.difference(columns_geom)
-            space_holes_geom = cascaded_union([hole.geometry for hole in space.holes.all()])
-            holes_geom.append(space_holes_geom.intersection(space.geometry))
-            space.geometry = space.geometry.difference(space_holes_geom)
-        holes_geom = cascaded_union(holes_geom)
-
-        for building in buildings:
-            building.original_geometry = building.geometry
-        for obj in buildings:
-            obj.geometry = obj.geometry.difference(holes_geom)
+
+        if use_cache:
+            geometries = LevelGeometries.get(level.pk)
+            for building in buildings:
+                building.original_geometry = building.geometry
+                building.geometry = geometries.building_parts[building.pk]
+            for space in spaces.values():
+                space.geometry = geometries.spaces[space.pk].difference(geometries.space_holes[space.pk])
+        else:
+            buildings_geom = cascaded_union([building.geometry for building in buildings])
+            holes_geom = []
+            for space in spaces.values():
+                if space.outside:
+                    space.geometry = space.geometry.difference(buildings_geom)
+                columns_geom = cascaded_union([column.geometry for column in space.columns.all()])
+                space.geometry = space.geometry.difference(columns_geom)
+                space_holes_geom = cascaded_union([hole.geometry for hole in space.holes.all()])
+                holes_geom.append(space_holes_geom.intersection(space.geometry))
+                space.geometry = space.geometry.difference(space_holes_geom)
+            holes_geom = cascaded_union(holes_geom)
+
+            for building in buildings:
+                building.original_geometry = building.geometry
+            for obj in buildings:
+                obj.geometry = obj.geometry.difference(holes_geom)
 
         results = []
         results.extend(buildings)
@@ -46,6 +64,40 @@ class EditorViewSet(ViewSet):
         results.extend(spaces.values())
         return results
 
+    @staticmethod
+    def _get_changed_level_pks(changeset):
+        """
+        Get the pks of all levels whose buildings, doors, spaces, holes or columns are modified by a changeset.
+        :return: set of level pks, or None if the changes might affect any level
+        """
+        changeset.fill_changes_cache()
+        level_pks = set()
+        space_pks = set()
+        for model, changed_objects in changeset.changed_objects.items():
+            if model in (Level, LocationGroup, LocationGroupCategory):
+                return None
+            if model in (Building, Door, Space):
+                field_name, pks = 'level', level_pks
+            elif model in (Hole, Column):
+                field_name, pks = 'space', space_pks
+            else:
+                continue
+
+            existing_pks = set()
+            for changed_object in changed_objects.values():
+                if not changed_object.is_created:
+                    existing_pks.add(changed_object.existing_object_pk)
+                value = changed_object.updated_fields.get(field_name)
+                if value is not None:
+                    pks.add(value)
+            pks.update(model.objects.filter(pk__in=existing_pks).values_list(field_name+'_id', flat=True))
+
+        created_spaces = changeset.created_objects.get(Space, {})
+        level_pks.update(created_spaces[pk].get('level') for pk in space_pks if pk in created_spaces)
+        level_pks.update(Space.objects.filter(pk__in=[pk for pk in space_pks if isinstance(pk, int)])
+                         .values_list('level_id', flat=True))
+        return level_pks
+
     @staticmethod
     def _get_levels_pk(request, level):
         # noinspection PyPep8Naming
@@ -78,10 +130,23 @@ class EditorViewSet(ViewSet):
             level = get_object_or_404(Level, pk=level)
 
             levels, levels_on_top, levels_under = self._get_levels_pk(request, level)
+            levels = tuple(levels)
+
+            # if the changeset does not modify these levels, the result is the same as for the unmodified map,
+            # which also means that the precomputed geometries can be used.
+            changed_level_pks = self._get_changed_level_pks(request.changeset)
+            use_cache = changed_level_pks is not None and not changed_level_pks.intersection(levels)
+            cache_key = 'editor:geometries:level:%d:%s' % (level.pk, (MapUpdate.cache_key() if use_cache
+                                                                      else request.changeset.cache_key_by_changes))
+            result = cache.get(cache_key)
+            if result is not None:
+                return Response(result)
+
             # don't prefetch groups for now as changesets do not yet work with m2m-prefetches
-            levels = Level.objects.filter(pk__in=levels).prefetch_related('buildings', 'spaces', 'doors',
-                                                                          'spaces__holes', 'spaces__groups',
-                                                                          'spaces__columns')
+            prefetch = ('buildings', 'spaces', 'doors', 'spaces__groups')
+            if not use_cache:
+                prefetch += ('spaces__holes', 'spaces__columns')
+            levels = Level.objects.filter(pk__in=levels).prefetch_related(*prefetch)
 
             levels = {s.pk: s for s in levels}
 
@@ -90,21 +155,26 @@ class EditorViewSet(ViewSet):
             levels_on_top = [levels[pk] for pk in levels_on_top]
 
             results = chain(
-                *(self._get_level_geometries(s) for s in levels_under),
-                self._get_level_geometries(level),
-                *(self._get_level_geometries(s) for s in levels_on_top)
+                *(self._get_level_geometries(s, use_cache) for s in levels_under),
+                self._get_level_geometries(level, use_cache),
+                *(self._get_level_geometries(s, use_cache) for s in levels_on_top)
             )
 
-            return Response([obj.to_geojson(instance=obj) for obj in results])
+            result = [obj.to_geojson(instance=obj) for obj in results]
+            cache.set(cache_key, result, 300)
+            return Response(result)
         elif space is not None:
             space = get_object_or_404(Space.objects.select_related('level', 'level__on_top_of'), pk=space)
             level = space.level
 
-            doors = [door for door in level.doors.all() if door.geometry.intersects(space.geometry)]
+            # prefilter by bounding box before the exact tests
+            doors = level.doors.intersecting_bbox(space.geometry.bounds)
+            doors = [door for door in doors if door.geometry.intersects(space.geometry)]
             doors_space_geom = cascaded_union([door.geometry for door in doors]+[space.geometry])
 
             levels, levels_on_top, levels_under = self._get_levels_pk(request, level.primary_level)
-            other_spaces = Space.objects.filter(level__pk__in=levels).prefetch_related('groups')
+            other_spaces = Space.objects.filter(level__pk__in=levels).intersecting_bbox(doors_space_geom.bounds)
+            other_spaces = other_spaces.prefetch_related('groups')
             other_spaces = [s for s in other_spaces
                             if s.geometry.intersects(doors_space_geom) and s.pk != space.pk]
             if level.on_top_of_id is None:
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-07-11 14:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0018_changeset_last_cleaned_with'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changedobject',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='updated'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-07-11 16:34
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def count_changed_objects(apps, schema_editor):
+    ChangeSet = apps.get_model('editor', 'ChangeSet')
+    for changeset in ChangeSet.objects.all():
+        changed_objects = changeset.changed_objects_set.all()
+        changeset.objects_created = changed_objects.filter(existing_object_pk__isnull=True, deleted=False).count()
+        changeset.objects_updated = changed_objects.filter(existing_object_pk__isnull=False, deleted=False).count()
+        changeset.objects_deleted = changed_objects.filter(existing_object_pk__isnull=False, deleted=True).count()
+        changeset.save()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0019_changedobject_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeset',
+            name='objects_created',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='objects created'),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='objects_deleted',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='objects deleted'),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='objects_updated',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='objects updated'),
+        ),
+        migrations.RunPython(count_changed_objects, migrations.RunPython.noop),
+    ]
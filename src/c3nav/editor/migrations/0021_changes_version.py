@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-07-12 11:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0020_changeset_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='changedobject',
+            name='updated',
+        ),
+        migrations.AddField(
+            model_name='changedobject',
+            name='version',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='version'),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='changes_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='changes version'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import json
 import typing
 from collections import OrderedDict
 from itertools import chain
@@ -9,7 +10,8 @@ from django.utils.translation import ugettext_lazy as _
 
 from c3nav.editor.utils import is_created_pk
 from c3nav.editor.wrappers import ModelInstanceWrapper
-from c3nav.mapdata.fields import JSONField
+from c3nav.mapdata.fields import GeometryField, JSONField, parse_geometry
+from c3nav.mapdata.utils.json import format_geometry
 
 
 class ChangedObjectManager(models.Manager):
@@ -21,9 +23,24 @@ class ApplyToInstanceError(Exception):
     pass
 
 
+class CircularDependencyError(ApplyToInstanceError):
+    """
+    Created objects refer to each other in a cycle, so there is no order in which they can be created.
+    :param cycles: list of cycles, each a list of ChangedObjects that refers to the next one
+    """
+    def __init__(self, cycles):
+        self.cycles = cycles
+        super().__init__('Circular dependency between created objects: '+'; '.join(
+            ' -> '.join('%s #%s' % (changed_object.model_class.__name__, changed_object.obj_pk)
+                        for changed_object in cycle+cycle[:1])
+            for cycle in cycles
+        ))
+
+
 class ChangedObject(models.Model):
     changeset = models.ForeignKey('editor.ChangeSet', on_delete=models.CASCADE, verbose_name=_('Change Set'))
     created = models.DateTimeField(auto_now_add=True, verbose_name=_('created'))
+    version = models.PositiveIntegerField(default=0, db_index=True, editable=False, verbose_name=_('version'))
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     existing_object_pk = models.PositiveIntegerField(null=True, verbose_name=_('id of existing object'))
     updated_fields = JSONField(default={}, verbose_name=_('updated fields'))
@@ -49,6 +66,23 @@ class ChangedObject(models.Model):
         self._m2m_removed_cache = {name: set(values) for name, values in self.m2m_removed.items()}
         if model_class is not None:
             self.model_class = model_class
+        self._counter_field = None if self.pk is None else self.counter_field
+
+    def __reduce__(self):
+        # the wrapped existing object is only kept for the current request, it is not stored in the changes cache
+        unpickle, args, data = super().__reduce__()
+        data = data.copy()
+        data['_set_object'] = None
+        return unpickle, args, data
+
+    @property
+    def counter_field(self):
+        """
+        Get the name of the ChangeSet counter field this object is counted in.
+        """
+        if self.is_created:
+            return None if self.deleted else 'objects_created'
+        return 'objects_deleted' if self.deleted else 'objects_updated'
 
     @property
     def model_class(self) -> typing.Optional[typing.Type[models.Model]]:
@@ -76,6 +110,7 @@ class ChangedObject(models.Model):
         model = self.model_class
 
         if not self.is_created:
+            # wrapped existing objects are memoized, ChangedObjects are kept in ChangeSet.changed_objects
             if self._set_object is None:
                 self._set_object = self.changeset.wrap_instance(model.objects.get(pk=self.existing_object_pk))
 
@@ -91,6 +126,19 @@ class ChangedObject(models.Model):
         obj._state.adding = False
         return self.changeset.wrap_instance(obj)
 
+    def get_created_dependencies(self) -> set:
+        """
+        Get the primary keys of all created objects this object refers to using foreign keys.
+        """
+        result = set()
+        for name, value in self.updated_fields.items():
+            if name.startswith('title_') or not is_created_pk(value):
+                continue
+            field = self.model_class._meta.get_field(name)
+            if field.many_to_one or field.one_to_one:
+                result.add(value)
+        return result
+
     def add_relevant_object_pks(self, object_pks, many=True):
         object_pks.setdefault(self.model_class, set()).add(self.obj_pk)
         for name, value in self.updated_fields.items():
@@ -113,10 +161,13 @@ class ChangedObject(models.Model):
         pk = self.obj_pk
 
         self.changeset.changed_objects.setdefault(model, {})[pk] = self
+        self.changeset._value_indexes.pop(model, None)
 
         if self.is_created:
             if not self.deleted:
                 self.changeset.created_objects.setdefault(model, {})[pk] = self.updated_fields
+            else:
+                self.changeset.created_objects.get(model, {}).pop(pk, None)
         else:
             if not self.deleted:
                 self.changeset.updated_existing.setdefault(model, {})[pk] = self.updated_fields
@@ -154,7 +205,10 @@ class ChangedObject(models.Model):
                         else:
                             setattr(instance, field.get_cache_name(), obj)
                     else:
-                        delattr(instance, field.get_cache_name())
+                        try:
+                            delattr(instance, field.get_cache_name())
+                        except AttributeError:
+                            pass
                         try:
                             value = created_pks[field.related_model][value]
                         except KeyError:
@@ -183,7 +237,12 @@ class ChangedObject(models.Model):
             else:
                 field = self.model_class._meta.get_field(name)
 
-                if not field.is_relation:
+                if isinstance(field, GeometryField):
+                    # compare the geometries, values of older changesets may still be stored as WKB
+                    current_value = getattr(current_obj, field.name)
+                    current_value = None if current_value is None else format_geometry(current_value)
+                    new_value = None if new_value is None else format_geometry(parse_geometry(new_value))
+                elif not field.is_relation:
                     current_value = field.get_prep_value(getattr(current_obj, field.name))
                 elif field.many_to_one or field.one_to_one:
                     current_value = getattr(current_obj, field.attname)
@@ -232,6 +291,9 @@ class ChangedObject(models.Model):
                 if field.name == 'titles':
                     for lang, title in value.items():
                         self.updated_fields['title_'+lang] = title
+                elif isinstance(field, GeometryField):
+                    # changesets always keep geometries as GeoJSON, no matter how the field stores them
+                    self.updated_fields[field.name] = None if value is None else json.dumps(format_geometry(value))
                 else:
                     self.updated_fields[field.name] = field.get_prep_value(value)
             elif field.many_to_one or field.one_to_one:
@@ -373,6 +435,7 @@ class ChangedObject(models.Model):
                 (not self.is_created and self.deleted))
 
     def save(self, *args, standalone=False, **kwargs):
+        self.changeset._forget_created_instances()
         self.m2m_added = {name: tuple(values) for name, values in self._m2m_added_cache.items()}
         self.m2m_removed = {name: tuple(values) for name, values in self._m2m_removed_cache.items()}
         if not self.does_something:
@@ -384,13 +447,29 @@ class ChangedObject(models.Model):
                 self.changeset.save()
                 self.changeset = self.changeset
         if self.does_something:
+            self.version = self.changeset.next_changes_version()
+            counter_field = self.counter_field
+            counter_changed = counter_field != self._counter_field
+            if counter_changed and self.pk is not None:
+                # only the save that actually flips the deleted flag moves this object to another counter
+                counter_changed = ChangedObject.objects.filter(pk=self.pk, deleted=not self.deleted).update(
+                    deleted=self.deleted
+                ) > 0
             super().save(*args, **kwargs)
+            if counter_changed:
+                self.changeset.update_counters(self._counter_field, counter_field)
+            self._counter_field = counter_field
         if not standalone and not self.changeset.fill_changes_cache():
             self.update_changeset_cache()
 
     def delete(self, **kwargs):
+        self.changeset._forget_created_instances()
         self.changeset._object_changed = True
-        super().delete(**kwargs)
+        deleted = super().delete(**kwargs)[1].get(self._meta.label, 0)
+        if self._counter_field is not None and deleted:
+            # if this object was already deleted concurrently, it was already removed from the counter
+            self.changeset.update_counters(self._counter_field, None)
+        self._counter_field = None
 
     def __repr__(self):
         return '<ChangedObject #%s on ChangeSet #%s>' % (str(self.pk), str(self.changeset_id))
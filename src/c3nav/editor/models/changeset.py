@@ -1,3 +1,4 @@
+import copy
 import operator
 import typing
 from collections import OrderedDict
@@ -11,14 +12,15 @@ from django.core.cache import cache
 from django.core.exceptions import FieldDoesNotExist
 from django.db import connection, models, transaction
 from django.db.models import Q
+from django.db.models.base import ModelState
 from django.urls import reverse
 from django.utils.http import int_to_base36
 from django.utils.timezone import make_naive
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import ungettext_lazy
 
-from c3nav.editor.models.changedobject import ApplyToInstanceError, ChangedObject
-from c3nav.editor.utils import is_created_pk
+from c3nav.editor.models.changedobject import ChangedObject, CircularDependencyError
+from c3nav.editor.utils import bulk_create_objects, bulk_update_m2m, bulk_update_objects, is_created_pk
 from c3nav.editor.wrappers import ModelInstanceWrapper, ModelWrapper
 from c3nav.mapdata.models import LocationSlug, MapUpdate
 from c3nav.mapdata.models.locations import LocationRedirect
@@ -50,6 +52,12 @@ class ChangeSet(models.Model):
                                     related_name='assigned_changesets', verbose_name=_('assigned to'))
     map_update = models.OneToOneField(MapUpdate, null=True, related_name='changeset', verbose_name=_('map update'))
     last_cleaned_with = models.ForeignKey(MapUpdate, null=True, related_name='checked_changesets')
+    objects_created = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('objects created'))
+    objects_updated = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('objects updated'))
+    objects_deleted = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('objects deleted'))
+    changes_version = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('changes version'))
+
+    counter_fields = ('objects_created', 'objects_updated', 'objects_deleted')
 
     class Meta:
         verbose_name = _('Change Set')
@@ -65,6 +73,8 @@ class ChangeSet(models.Model):
         self.deleted_existing = {}
         self.m2m_added = {}
         self.m2m_removed = {}
+        self._value_indexes = {}
+        self._created_instances = {}
 
         self._object_changed = False
         self._request = None
@@ -161,16 +171,27 @@ class ChangeSet(models.Model):
 
         cache_key = self.cache_key_by_changes + ':cache'
 
+        self._value_indexes = {}
+        self._created_instances = {}
+
         cached_cache = cache.get(cache_key)
         if cached_cache is not None:
             (self.changed_objects, self.created_objects, self.updated_existing,
              self.deleted_existing, self.m2m_added, self.m2m_removed) = cached_cache
             return True
 
-        self.changed_objects = {}
-        for change in self.changed_objects_set.all():
-            change.update_changeset_cache()
-
+        if not self._fill_changes_cache_incremental():
+            self.changed_objects = {}
+            self.created_objects = {}
+            self.updated_existing = {}
+            self.deleted_existing = {}
+            self.m2m_added = {}
+            self.m2m_removed = {}
+            for change in self.changed_objects_set.all():
+                change.update_changeset_cache()
+
+        # the incremental fill starts from an older state, so it has to be cleaned as well.
+        # this is cheap if nothing changed, _clean_changes() returns early if no map update happened since.
         if self.state != 'applied' and not self._cleaning_changes:
             self._cleaning_changes = True
             try:
@@ -178,23 +199,76 @@ class ChangeSet(models.Model):
             finally:
                 self._cleaning_changes = False
 
-        cache.set(cache_key, (self.changed_objects, self.created_objects, self.updated_existing,
-                              self.deleted_existing, self.m2m_added, self.m2m_removed), 300)
+        cached_cache = (self.changed_objects, self.created_objects, self.updated_existing,
+                        self.deleted_existing, self.m2m_added, self.m2m_removed)
+        cache.set(cache_key, cached_cache, 300)
+
+        last_version = max((change.version for change in self.iter_changed_objects()), default=0)
+        cache.set(self.incremental_cache_key, (last_version, cached_cache), 300)
 
         return True
 
+    def _fill_changes_cache_incremental(self):
+        """
+        Continue with the cached changes cache of a previous version of this ChangeSet by only applying
+        ChangedObjects that were created or updated since then.
+        Deleted ChangedObjects can't be detected this way, so if any ChangedObject in the cache no longer exists,
+        this fails.
+        :return: True if the changes cache was filled, False if it has to be filled from scratch
+        """
+        incremental_cache = cache.get(self.incremental_cache_key)
+        if incremental_cache is None:
+            return False
+
+        last_version, cached_cache = incremental_cache
+        (self.changed_objects, self.created_objects, self.updated_existing,
+         self.deleted_existing, self.m2m_added, self.m2m_removed) = cached_cache
+
+        for change in self.changed_objects_set.filter(version__gt=last_version):
+            change.update_changeset_cache()
+
+        cached_pks = set(change.pk for change in self.iter_changed_objects())
+        return cached_pks == set(self.changed_objects_set.values_list('pk', flat=True))
+
     def iter_changed_objects(self) -> typing.Iterable[ChangedObject]:
         return chain(*(changed_objects.values() for changed_objects in self.changed_objects.values()))
 
+    def _get_touched_objects(self, last_map_update_pk):
+        """
+        Get the objects that were changed by map updates since this changeset was last cleaned.
+        Only map updates that come from applied changesets can be analysed this way.
+        :return: tuple of a dict of pk sets by model and whether slugs were touched, or None if unknown
+        """
+        if self.last_cleaned_with_id is None:
+            return None
+
+        map_updates = MapUpdate.objects.filter(pk__gt=self.last_cleaned_with_id, pk__lte=last_map_update_pk)
+        if map_updates.filter(changeset__isnull=True).exists():
+            return None
+
+        touched = {}
+        slugs_touched = False
+        for changed_object in ChangedObject.objects.filter(changeset__map_update__in=map_updates):
+            model = changed_object.model_class
+            if issubclass(model, LocationSlug) and (changed_object.is_created or
+                                                    'slug' in changed_object.updated_fields):
+                slugs_touched = True
+            if not changed_object.is_created:
+                touched.setdefault(model, set()).add(changed_object.existing_object_pk)
+        return touched, slugs_touched
+
     def _clean_changes(self):
         with self.lock_to_edit() as changeset:
             last_map_update_pk = MapUpdate.last_update()[0]
             if changeset.last_cleaned_with_id == last_map_update_pk:
                 return
 
+            touched = changeset._get_touched_objects(last_map_update_pk)
+
             changed_objects = changeset.changed_objects_set.all()
 
             # delete changed objects that refer in some way to deleted objects and clean up m2m changes
+            # this is always done for all objects, because objects can also get deleted by cascading
             object_pks = {}
             for changed_object in changed_objects:
                 changed_object.add_relevant_object_pks(object_pks)
@@ -206,65 +280,41 @@ class ChangeSet(models.Model):
                 pks = set(pk for pk in pks if not is_created_pk(pk))
                 deleted_object_pks[model] = pks - set(model.objects.filter(pk__in=pks).values_list('pk', flat=True))
 
-            repeat = True
-            while repeat:
-                repeat = False
-                for changed_object in changed_objects:
-                    if changed_object.handle_deleted_object_pks(deleted_object_pks):
+            if any(deleted_object_pks.values()):
+                repeat = True
+                while repeat:
+                    repeat = False
+                    for changed_object in changed_objects:
+                        if changed_object.handle_deleted_object_pks(deleted_object_pks):
+                            to_save.add(changed_object)
+                        if changed_object.pk is None:
+                            repeat = True
+
+                    # remove deleted objects
+                    changed_objects = [obj for obj in changed_objects if obj.pk is not None]
+
+            # only objects that were changed since the last cleaning have to be cleaned again
+            if touched is None:
+                to_clean = changed_objects
+            else:
+                touched, slugs_touched = touched
+                to_clean = [obj for obj in changed_objects
+                            if not obj.is_created and obj.existing_object_pk in touched.get(obj.model_class, ())]
+
+            if to_clean:
+                # clean updated fields
+                objects = changeset.get_objects(many=False, changed_objects=to_clean, prefetch_related=('groups', ))
+                for changed_object in to_clean:
+                    if changed_object.clean_updated_fields(objects):
                         to_save.add(changed_object)
-                    if changed_object.pk is None:
-                        repeat = True
-
-                # remove deleted objects
-                changed_objects = [obj for obj in changed_objects if obj.pk is not None]
-
-            # clean updated fields
-            objects = changeset.get_objects(many=False, changed_objects=changed_objects, prefetch_related=('groups', ))
-            for changed_object in changed_objects:
-                if changed_object.clean_updated_fields(objects):
-                    to_save.add(changed_object)
-
-            # clean m2m
-            for changed_object in changed_objects:
-                if changed_object.clean_m2m(objects):
-                    to_save.add(changed_object)
 
-            # remove duplicate slugs
-            slugs = set()
-            for changed_object in changed_objects:
-                if issubclass(changed_object.model_class, LocationSlug):
-                    slug = changed_object.updated_fields.get('slug', None)
-                    if slug is not None:
-                        slugs.add(slug)
-
-            qs = LocationSlug.objects.filter(slug__in=slugs)
-            if slugs:
-                qs = qs.filter(reduce(operator.or_, (Q(slug__startswith=slug+'__') for slug in slugs)))
-            existing_slugs = dict(qs.values_list('slug', 'redirect__target_id'))
-
-            slug_length = LocationSlug._meta.get_field('slug').max_length
-            for changed_object in changed_objects:
-                if issubclass(changed_object.model_class, LocationSlug):
-                    slug = changed_object.updated_fields.get('slug', None)
-                    if slug is None:
-                        continue
-                    if slug in existing_slugs:
-                        redirect_to = existing_slugs[slug]
-                        if issubclass(changed_object.model_class, LocationRedirect) and redirect_to is not None:
-                            to_save.discard(changed_object)
-                            changed_object.delete()
-                            continue
-                        new_slug = slug
-                        i = 0
-                        while new_slug in existing_slugs:
-                            suffix = '__'+str(i)
-                            new_slug = slug[:slug_length-len(suffix)]+suffix
-                            i += 1
-                        slug = new_slug
-                        changed_object.updated_fields['slug'] = new_slug
+                # clean m2m
+                for changed_object in to_clean:
+                    if changed_object.clean_m2m(objects):
                         to_save.add(changed_object)
-                    existing_slugs[slug] = (None if not issubclass(changed_object.model_class, LocationRedirect)
-                                            else changed_object.updated_fields['target'])
+
+            if touched is None or slugs_touched:
+                changeset._clean_slugs(changed_objects, to_save)
 
             for changed_object in to_save:
                 changed_object.save(standalone=True)
@@ -272,6 +322,51 @@ class ChangeSet(models.Model):
             changeset.last_cleaned_with_id = last_map_update_pk
             changeset.save()
 
+    @staticmethod
+    def _clean_slugs(changed_objects, to_save):
+        """
+        Rename or remove changed slugs that collide with existing ones.
+        """
+        # remove duplicate slugs
+        slugs = set()
+        for changed_object in changed_objects:
+            if issubclass(changed_object.model_class, LocationSlug):
+                slug = changed_object.updated_fields.get('slug', None)
+                if slug is not None:
+                    slugs.add(slug)
+
+        if not slugs:
+            return
+
+        # fetch all existing slugs that are or could be generated from these slugs in one query
+        qs = LocationSlug.objects.filter(reduce(operator.or_, chain((Q(slug__in=slugs), ),
+                                                                    (Q(slug__startswith=slug+'__') for slug in slugs))))
+        existing_slugs = dict(qs.values_list('slug', 'redirect__target_id'))
+
+        slug_length = LocationSlug._meta.get_field('slug').max_length
+        for changed_object in changed_objects:
+            if issubclass(changed_object.model_class, LocationSlug):
+                slug = changed_object.updated_fields.get('slug', None)
+                if slug is None:
+                    continue
+                if slug in existing_slugs:
+                    redirect_to = existing_slugs[slug]
+                    if issubclass(changed_object.model_class, LocationRedirect) and redirect_to is not None:
+                        to_save.discard(changed_object)
+                        changed_object.delete()
+                        continue
+                    new_slug = slug
+                    i = 0
+                    while new_slug in existing_slugs:
+                        suffix = '__'+str(i)
+                        new_slug = slug[:slug_length-len(suffix)]+suffix
+                        i += 1
+                    slug = new_slug
+                    changed_object.updated_fields['slug'] = new_slug
+                    to_save.add(changed_object)
+                existing_slugs[slug] = (None if not issubclass(changed_object.model_class, LocationRedirect)
+                                        else changed_object.updated_fields['target'])
+
     """
     Analyse Changes
     """
@@ -291,19 +386,24 @@ class ChangeSet(models.Model):
         for model, pks in object_pks.items():
             objects[model] = {pk: model(pk=pk) for pk in pks}
 
-        slug_submodels = tuple(model for model in object_pks.keys() if issubclass(model, LocationSlug))
-        if slug_submodels:
-            object_pks[LocationSlug] = reduce(operator.or_, (object_pks[model] for model in slug_submodels))
-        for model in slug_submodels:
-            object_pks.pop(model)
-
-        # retrieve relevant objects
+        # LocationSlug pks can refer to any submodel, so find out their model first
+        slug_pks = set(object_pks.pop(LocationSlug, ()))
+        slug_pks.difference_update(*(pks for model, pks in object_pks.items() if issubclass(model, LocationSlug)))
+        slug_objects = [self.get_created_object(LocationSlug, pk, allow_deleted=True, shared=True)._obj
+                        for pk in slug_pks if is_created_pk(pk)]
+        existing_slug_pks = set(pk for pk in slug_pks if not is_created_pk(pk))
+        if existing_slug_pks:
+            slug_objects.extend(obj.get_child() for obj in LocationSlug.objects.filter(pk__in=existing_slug_pks))
+        for obj in slug_objects:
+            if obj is not None:
+                object_pks.setdefault(obj.__class__, set()).add(obj.pk)
+                objects.setdefault(obj.__class__, {})
+
+        # retrieve relevant objects, one query per model (plus one per model and prefetch)
         for model, pks in object_pks.items():
-            if not pks:
-                continue
             created_pks = set(pk for pk in pks if is_created_pk(pk))
             existing_pks = pks - created_pks
-            model_objects = {}
+            model_objects = objects[model]
             if existing_pks:
                 qs = model.objects.filter(pk__in=existing_pks)
                 for prefetch in prefetch_related:
@@ -313,18 +413,16 @@ class ChangeSet(models.Model):
                         pass
                     else:
                         qs = qs.prefetch_related(prefetch)
-                for obj in model.objects.filter(pk__in=existing_pks):
-                    if model == LocationSlug:
-                        obj = obj.get_child()
+                for obj in qs:
                     model_objects[obj.pk] = obj
-            if created_pks:
-                for pk in created_pks:
-                    model_objects[pk] = self.get_created_object(model, pk, allow_deleted=True)._obj
-            objects[model] = model_objects
+            for pk in created_pks:
+                model_objects[pk] = self.get_created_object(model, pk, allow_deleted=True, shared=True)._obj
 
-        # add LocationSlug objects as their correct model
-        for pk, obj in objects.get(LocationSlug, {}).items():
-            objects.setdefault(obj.__class__, {})[pk] = obj
+        # add all LocationSlug objects with their correct model
+        slug_objects = objects.setdefault(LocationSlug, {})
+        for model, model_objects in tuple(objects.items()):
+            if model is not LocationSlug and issubclass(model, LocationSlug):
+                slug_objects.update(model_objects)
 
         return objects
 
@@ -338,6 +436,44 @@ class ChangeSet(models.Model):
         r = tuple((pk, values[name]) for pk, values in self.updated_existing.get(model, {}).items() if name in values)
         return r
 
+    def get_value_index(self, model: models.Model, name: str) -> tuple:
+        """
+        Get the new values of a specific field for existing and created objects of a model, with their pks.
+        The index is built on first use and dropped as soon as a changed object of this model is updated.
+        :param model: model class
+        :param name: field name
+        :return: tuple of one index for existing objects and one for created objects, each index is a tuple of
+                 a dictionary of sets of pks by value, a tuple of (value, set of pks) tuples for unhashable values
+                 and a set of all pks
+        """
+        self.fill_changes_cache()
+        model_indexes = self._value_indexes.setdefault(model, {})
+        try:
+            return model_indexes[name]
+        except KeyError:
+            pass
+
+        attname = getattr(model._meta.get_field(name), 'attname', name)
+        created_values = ((pk, getattr(self.get_created_object(model, pk, shared=True), attname))
+                          for pk in self.created_objects.get(model, {}).keys())
+        index = (self._group_pks_by_value(self.get_changed_values(model, name)),
+                 self._group_pks_by_value(created_values))
+        model_indexes[name] = index
+        return index
+
+    @staticmethod
+    def _group_pks_by_value(items):
+        groups = {}
+        unhashable = []
+        all_pks = set()
+        for pk, value in items:
+            all_pks.add(pk)
+            try:
+                groups.setdefault(value, set()).add(pk)
+            except TypeError:
+                unhashable.append((value, {pk}))
+        return groups, tuple(unhashable), all_pks
+
     def get_changed_object(self, obj) -> ChangedObject:
         if isinstance(obj, ModelInstanceWrapper):
             obj = obj._obj
@@ -360,23 +496,74 @@ class ChangeSet(models.Model):
 
         return ChangedObject(changeset=self, model_class=model, existing_object_pk=pk)
 
-    def get_created_object(self, model, pk, get_foreign_objects=False, allow_deleted=False):
+    def get_created_object(self, model, pk, get_foreign_objects=False, allow_deleted=False, shared=False):
         """
         Gets a created model instance.
         :param model: model class
         :param pk: primary key
         :param get_foreign_objects: whether to fetch foreign objects and not just set their id to field.attname
         :param allow_deleted: return created objects that have already been deleted (needs get_history=True)
+        :param shared: return the instance that is kept until the object is changed again instead of a copy of it.
+                       only use this if the instance will not be modified.
         :return: a wrapped model instance
         """
         self.fill_changes_cache()
         if issubclass(model, ModelWrapper):
             model = model._obj
 
-        obj = self.get_changed_object(model(pk=pk))
-        if obj.deleted and not allow_deleted:
+        try:
+            changed_object, obj = self._created_instances[(pk, get_foreign_objects)]
+        except KeyError:
+            changed_object = self.get_changed_object(model(pk=pk))
+            obj = changed_object.get_obj(get_foreign_objects=get_foreign_objects)
+            self._created_instances[(pk, get_foreign_objects)] = (changed_object, obj)
+        else:
+            if not isinstance(obj._obj, model):
+                raise model.DoesNotExist
+
+        if changed_object.deleted and not allow_deleted:
             raise model.DoesNotExist
-        return obj.get_obj(get_foreign_objects=get_foreign_objects)
+        return obj if shared else self._copy_wrapped_instance(obj)
+
+    def _forget_created_instances(self):
+        # created instances reference other created instances through their foreign keys,
+        # so any changed object invalidates all of them
+        self._created_instances.clear()
+
+    @classmethod
+    def _copy_wrapped_instance(cls, obj: ModelInstanceWrapper, memo=None) -> ModelInstanceWrapper:
+        """
+        Copy a wrapped instance without applying its changes again.
+        Mutable field values and related instances are copied too, so modifying the copy doesn't modify the original.
+        """
+        if memo is None:
+            memo = {}
+        try:
+            return memo[id(obj)]
+        except KeyError:
+            pass
+
+        if isinstance(obj, ModelInstanceWrapper):
+            result = obj.__class__.__new__(obj.__class__)
+            result._changeset = obj._changeset
+            memo[id(obj)] = result
+            result._obj = cls._copy_wrapped_instance(obj._obj, memo)
+            return result
+
+        instance = obj.__class__.__new__(obj.__class__)
+        memo[id(obj)] = instance
+        instance.__dict__.update(obj.__dict__)
+        instance._state = ModelState()
+        instance._state.__dict__.update(obj._state.__dict__)
+        for field in instance._meta.concrete_fields:
+            value = instance.__dict__.get(field.attname)
+            if isinstance(value, (dict, list)):
+                instance.__dict__[field.attname] = copy.deepcopy(value)
+            if field.many_to_one or field.one_to_one:
+                value = instance.__dict__.get(field.get_cache_name())
+                if value is not None:
+                    instance.__dict__[field.get_cache_name()] = cls._copy_wrapped_instance(value, memo)
+        return instance
 
     def get_created_pks(self, model) -> set:
         """
@@ -550,6 +737,9 @@ class ChangeSet(models.Model):
             for changed_object in changed_objects:
                 (created_objects if changed_object.is_created else existing_objects).append(changed_object)
 
+            # resolve the order in which created objects have to be created before changing anything
+            creation_batches = self._get_creation_batches(created_objects)
+
             objects = self.get_objects(changed_objects=changed_objects)
 
             # remove slugs on all changed existing objects
@@ -563,30 +753,26 @@ class ChangeSet(models.Model):
                                         changed_object.deleted))
             LocationRedirect.objects.filter(pk__in=redirects_deleted).delete()
 
-            # create created objects
+            # create created objects, in batches that only refer to objects created in previous batches
             created_pks = {}
-            objects_to_create = set(created_objects)
-            while objects_to_create:
-                created_in_last_run = set()
-                for created_object in objects_to_create:
+            for batch in creation_batches:
+                objects_by_model = OrderedDict()
+                for created_object in batch:
                     model = created_object.model_class
-                    pk = created_object.obj_pk
-
-                    # lets try to create this object
                     obj = model()
-                    try:
-                        created_object.apply_to_instance(obj, created_pks=created_pks)
-                    except ApplyToInstanceError:
-                        continue
-
-                    obj.save()
-                    created_in_last_run.add(created_object)
-                    created_pks.setdefault(model, {})[pk] = obj.pk
-                    objects.setdefault(model, {})[pk] = obj
+                    created_object.apply_to_instance(obj, created_pks=created_pks)
+                    objects_by_model.setdefault(model, []).append((created_object.obj_pk, obj))
 
-                objects_to_create -= created_in_last_run
+                for model, model_objects in objects_by_model.items():
+                    bulk_create_objects(model, [obj for pk, obj in model_objects])
+                    for pk, obj in model_objects:
+                        created_pks.setdefault(model, {})[pk] = obj.pk
+                        if issubclass(model, LocationSlug):
+                            created_pks.setdefault(LocationSlug, {})[pk] = obj.pk
+                        objects.setdefault(model, {})[pk] = obj
 
             # update existing objects
+            updated_by_model = OrderedDict()
             for existing_object in existing_objects:
                 if existing_object.deleted:
                     continue
@@ -595,26 +781,39 @@ class ChangeSet(models.Model):
 
                 obj = objects[model][pk]
                 existing_object.apply_to_instance(obj, created_pks=created_pks)
-                obj.save()
+                objs, field_names = updated_by_model.setdefault(model, ([], set()))
+                objs.append(obj)
+                field_names.update(('titles' if name.startswith('title_') else name)
+                                   for name in existing_object.updated_fields.keys())
+
+            for model, (objs, field_names) in updated_by_model.items():
+                bulk_update_objects(model, objs, field_names)
 
             # delete existing objects
+            deleted_by_model = OrderedDict()
             for existing_object in existing_objects:
                 if not existing_object.deleted and not issubclass(existing_object.model_class, LocationRedirect):
                     continue
-                model = existing_object.model_class
-                pk = existing_object.obj_pk
+                deleted_by_model.setdefault(existing_object.model_class, set()).add(existing_object.obj_pk)
 
-                obj = objects[model][pk]
-                obj.delete()
+            for model, pks in deleted_by_model.items():
+                model.objects.filter(pk__in=pks).delete()
 
             # update m2m
-            for changed_object in changed_objects:
-                obj = objects[changed_object.model_class][changed_object.obj_pk]
-                for mode, updates in (('remove', changed_object.m2m_removed), ('add', changed_object.m2m_added)):
+            m2m_changes = OrderedDict()
+            for changed_object in chain(created_objects, existing_objects):
+                if changed_object.deleted:
+                    continue
+                model = changed_object.model_class
+                obj = objects[model][changed_object.obj_pk]
+                for i, updates in enumerate((changed_object.m2m_added, changed_object.m2m_removed)):
                     for name, pks in updates.items():
-                        field = changed_object.model_class._meta.get_field(name)
-                        pks = tuple(objects[field.related_model][pk].pk for pk in pks)
-                        getattr(getattr(obj, name), mode)(*pks)
+                        field = model._meta.get_field(name)
+                        pks = set(objects[field.related_model][pk].pk for pk in pks)
+                        m2m_changes.setdefault(field, ({}, {}))[i].setdefault(obj.pk, set()).update(pks)
+
+            for field, (added, removed) in m2m_changes.items():
+                bulk_update_m2m(field, added, removed)
 
             update = self.updates.create(user=user, state='applied')
             map_update = MapUpdate.objects.create(user=user, type='changeset')
@@ -624,6 +823,66 @@ class ChangeSet(models.Model):
             self.map_update = map_update
             self.save()
 
+    @staticmethod
+    def _get_creation_batches(created_objects):
+        """
+        Sort created objects topologically by their foreign keys to other created objects.
+        :return: list of batches, each batch only refers to objects created in previous batches
+        :raises CircularDependencyError: if some created objects refer to each other in a cycle
+        """
+        created_objects = OrderedDict((created_object.obj_pk, created_object) for created_object in created_objects)
+        pks = set(created_objects.keys())
+        dependencies = OrderedDict((pk, created_object.get_created_dependencies() & pks)
+                                   for pk, created_object in created_objects.items())
+        dependents = {pk: [] for pk in created_objects}
+        for pk, pk_dependencies in dependencies.items():
+            for dependency in pk_dependencies:
+                dependents[dependency].append(pk)
+
+        remaining = OrderedDict((pk, len(pk_dependencies)) for pk, pk_dependencies in dependencies.items())
+        batches = []
+        batch = [pk for pk, count in remaining.items() if not count]
+        while batch:
+            batches.append([created_objects[pk] for pk in batch])
+            next_batch = []
+            for pk in batch:
+                remaining.pop(pk)
+                for dependent in dependents[pk]:
+                    remaining[dependent] -= 1
+                    if not remaining[dependent]:
+                        next_batch.append(dependent)
+            batch = next_batch
+
+        if remaining:
+            raise CircularDependencyError([[created_objects[pk] for pk in cycle]
+                                           for cycle in ChangeSet._find_cycles(dependencies, remaining.keys())])
+        return batches
+
+    @staticmethod
+    def _find_cycles(dependencies, pks):
+        """
+        Find cycles in a dependency graph where every node depends on at least one other node of the graph.
+        Every node is part of a cycle or depends on one, so following dependencies always ends in a cycle.
+        :param dependencies: dict of dependencies by node
+        :param pks: the nodes of the graph
+        :return: list of cycles, each a list of nodes
+        """
+        pks = set(pks)
+        visited = set()
+        cycles = []
+        for start in sorted(pks, key=str):
+            path = []
+            positions = {}
+            pk = start
+            while pk not in visited:
+                visited.add(pk)
+                positions[pk] = len(path)
+                path.append(pk)
+                pk = min(dependencies[pk] & pks, key=str)
+            if pk in positions:
+                cycles.append(path[positions[pk]:])
+        return cycles
+
     def activate(self, request):
         request.session['changeset'] = self.pk
 
@@ -635,19 +894,34 @@ class ChangeSet(models.Model):
         """
         Get the number of changed objects.
         """
-        self.fill_changes_cache()
-        count = 0
-        changed_locationslug_pks = set()
-        for model, objects in self.changed_objects.items():
-            if issubclass(model, LocationSlug):
-                if model == LocationRedirect:
-                    continue
-                changed_locationslug_pks.update(objects.keys())
-            count += sum(1 for obj in objects.values() if not obj.is_created or not obj.deleted)
+        return self.objects_created + self.objects_updated + self.objects_deleted
+
+    def next_changes_version(self):
+        """
+        Get a new version for a changed object that is being saved.
+        Versions are counted up by the database, so unlike timestamps, they increase even across servers.
+        The changeset row stays locked until the transaction ends, so versions are committed in order.
+        """
+        ChangeSet.objects.filter(pk=self.pk).update(changes_version=models.F('changes_version') + 1)
+        self.changes_version = ChangeSet.objects.filter(pk=self.pk).values_list('changes_version', flat=True).get()
+        return self.changes_version
 
-        count += len(set(obj.updated_fields['target']
-                         for obj in self.changed_objects.get(LocationRedirect, {}).values()) - changed_locationslug_pks)
-        return count
+    def update_counters(self, decrement=None, increment=None):
+        """
+        Move one changed object from one counter to another. Called by ChangedObject on save and delete.
+        The database is updated relatively, so concurrent changes or outdated instances don't matter.
+        :param decrement: name of the counter field to decrement or None
+        :param increment: name of the counter field to increment or None
+        """
+        updates = {}
+        if decrement is not None:
+            updates[decrement] = models.F(decrement) - 1
+            setattr(self, decrement, getattr(self, decrement) - 1)
+        if increment is not None:
+            updates[increment] = models.F(increment) + 1
+            setattr(self, increment, getattr(self, increment) + 1)
+        if updates and self.pk is not None:
+            ChangeSet.objects.filter(pk=self.pk).update(**updates)
 
     @property
     def count_display(self):
@@ -671,6 +945,10 @@ class ChangeSet(models.Model):
         last_change = self.created if self.last_change_id is None else self.last_change.datetime
         return (int_to_base36(self.last_change_id or 0)+'_'+int_to_base36(int(make_naive(last_change).timestamp())))
 
+    @property
+    def incremental_cache_key(self):
+        return ':'.join(('editor:changeset', str(self.pk), MapUpdate.cache_key(), 'incremental'))
+
     @property
     def cache_key_by_changes(self):
         return ':'.join(('editor:changeset', str(self.pk), MapUpdate.cache_key(), self.last_change_cache_key))
@@ -703,6 +981,11 @@ class ChangeSet(models.Model):
     def save(self, *args, **kwargs):
         if self._original_state == 'applied':
             raise TypeError('Applied change sets can not be edited.')
+        if self.pk is not None and 'update_fields' not in kwargs:
+            # counters and the changes version are only updated relatively, don't overwrite them with outdated values
+            kwargs['update_fields'] = tuple(field.name for field in self._meta.concrete_fields
+                                            if not field.primary_key and field.name not in self.counter_fields and
+                                            field.name != 'changes_version')
         super().save(*args, **kwargs)
         if self._request is not None:
             self.activate(self._request)
@@ -1,6 +1,9 @@
+import operator
+from functools import reduce
 from typing import Union
 
-from django.db import models
+from django.db import connection, models
+from django.db.models import Case, Q, Value, When
 
 
 def is_created_pk(pk):
@@ -29,3 +32,72 @@ def get_field_value(obj, field: Union[str, models.Field]):
     if name.startswith('title_'):
         current_value = current_value.get(name[6:], '')
     return current_value
+
+
+def bulk_create_objects(model, objs):
+    """
+    Create model instances in as few queries as possible and set their primary keys.
+    Falls back to saving them one by one for multi-table inheritance models
+    or if the database backend can't return the new primary keys.
+    """
+    if model._meta.parents or not connection.features.can_return_ids_from_bulk_insert:
+        for obj in objs:
+            obj.save()
+        return
+    for obj in objs:
+        if hasattr(obj, 'recalculate_bounds'):
+            obj.recalculate_bounds()
+    model.objects.bulk_create(objs)
+
+
+def bulk_update_objects(model, objs, field_names, batch_size=500):
+    """
+    Save the given fields of model instances with one UPDATE query per table and batch.
+    :param field_names: names of the fields to save, fields of parent models are supported
+    """
+    if not objs or not field_names:
+        return
+    field_names = set(field_names)
+    if 'geometry' in field_names and hasattr(objs[0], 'recalculate_bounds'):
+        for obj in objs:
+            obj.recalculate_bounds()
+        field_names.update(('minx', 'miny', 'maxx', 'maxy'))
+
+    fields_by_model = {}
+    for name in field_names:
+        field = model._meta.get_field(name)
+        fields_by_model.setdefault(field.model._meta.concrete_model, []).append(field)
+
+    for i in range(0, len(objs), batch_size):
+        batch = objs[i:i+batch_size]
+        for concrete_model, fields in fields_by_model.items():
+            concrete_model._base_manager.filter(pk__in=tuple(obj.pk for obj in batch)).update(**{
+                field.attname: Case(*(When(pk=obj.pk, then=Value(getattr(obj, field.attname), output_field=field))
+                                      for obj in batch), output_field=field)
+                for field in fields
+            })
+
+
+def bulk_update_m2m(field, added, removed):
+    """
+    Add and remove many to many relations with one query each using the through model.
+    :param field: ManyToManyField
+    :param added: dict of primary keys to sets of related primary keys to add
+    :param removed: dict of primary keys to sets of related primary keys to remove
+    """
+    through = field.remote_field.through
+    source_name = field.m2m_field_name()+'_id'
+    target_name = field.m2m_reverse_field_name()+'_id'
+
+    removed = {pk: values for pk, values in removed.items() if values}
+    if removed:
+        through.objects.filter(reduce(operator.or_, (Q(**{source_name: pk, target_name+'__in': values})
+                                                     for pk, values in removed.items()))).delete()
+
+    added = {pk: values for pk, values in added.items() if values}
+    if added:
+        existing = through.objects.filter(**{source_name+'__in': added.keys()})
+        existing = set(existing.values_list(source_name, target_name))
+        through.objects.bulk_create([through(**{source_name: pk, target_name: value})
+                                     for pk, values in added.items() for value in values
+                                     if (pk, value) not in existing])
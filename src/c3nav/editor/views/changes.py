@@ -13,6 +13,7 @@ from rest_framework.exceptions import PermissionDenied
 
 from c3nav.editor.forms import ChangeSetForm, RejectForm
 from c3nav.editor.models import ChangeSet
+from c3nav.editor.models.changedobject import CircularDependencyError
 from c3nav.editor.utils import is_created_pk
 from c3nav.editor.views.base import sidebar_view
 from c3nav.mapdata.models.locations import LocationRedirect, LocationSlug
@@ -142,7 +143,11 @@ def changeset_detail(request, pk):
                     return redirect(reverse('editor.changesets.detail', kwargs={'pk': changeset.pk}))
 
                 if request.POST.get('apply_confirm') == '1':
-                    changeset.apply(request.user)
+                    try:
+                        changeset.apply(request.user)
+                    except CircularDependencyError as e:
+                        messages.error(request, _('These changes can not be applied. %s') % e)
+                        return redirect(reverse('editor.changesets.detail', kwargs={'pk': changeset.pk}))
                     messages.success(request, _('You accepted and applied these changes.'))
                     return redirect(reverse('editor.changesets.detail', kwargs={'pk': changeset.pk}))
 
@@ -234,6 +234,9 @@ class ModelInstanceWrapper(BaseWrapper):
         """
         Create changes in changeset instead of saving.
         """
+        if hasattr(self._obj, 'recalculate_bounds'):
+            # the model's save() method isn't called, so the bounds have to be updated here
+            self._obj.recalculate_bounds()
         self._changeset.get_changed_object(self._obj).save_instance(self)
 
     def delete(self):
@@ -362,30 +365,56 @@ class BaseQueryWrapper(BaseWrapper):
         """
         return self._wrap_queryset(self._obj.order_by(*args))
 
-    def _filter_values(self, q, field_name, check):
+    def _filter_values(self, q, field_name, check, values=None):
         """
         Filter by value.
         :param q: base Q object to give to the database and to modify
         :param field_name: name of the field whose value should be compared
         :param check: comparision function that only gets the new value
+        :param values: for exact and in lookups, the values that match. these are looked up in the value index
+                       instead of calling check for every value.
         :return: new Q object and set of matched existing pks
         """
-        other_values = ()
-        submodels = [model for model in self.model._submodels]
-        for model in submodels:
-            other_values += self._changeset.get_changed_values(model, field_name)
-        add_pks = []
-        remove_pks = []
-        for pk, new_value in other_values:
-            (add_pks if check(new_value) else remove_pks).append(pk)
+        if values is not None:
+            values = tuple(values)
+        add_pks = set()
+        remove_pks = set()
         created_pks = set()
-        for model in submodels:
-            for pk, values in self._changeset.created_objects.get(model, {}).items():
-                field_name = getattr(model._meta.get_field(field_name), 'attname', field_name)
-                if check(getattr(self._changeset.get_created_object(self._obj.model, pk), field_name)):
-                    created_pks.add(pk)
+        for model in self.model._submodels:
+            changed_index, created_index = self._changeset.get_value_index(model, field_name)
+            # all changed existing objects are excluded from the database lookup and added again if they match
+            remove_pks.update(changed_index[2])
+            add_pks.update(self._lookup_value_index(changed_index, check, values))
+            created_pks.update(self._lookup_value_index(created_index, check, values))
+
+        return (q & ~Q(pk__in=remove_pks - add_pks)) | Q(pk__in=add_pks), created_pks
+
+    @staticmethod
+    def _lookup_value_index(index, check, values):
+        """
+        Get the pks of all matching values in a value index from ChangeSet.get_value_index().
+        """
+        groups, unhashable = index[:2]
+        if values is not None:
+            try:
+                pks = set().union(*(groups.get(value, ()) for value in values))
+            except TypeError:
+                # unhashable values can only be checked
+                pass
+            else:
+                for value, value_pks in unhashable:
+                    if check(value):
+                        pks.update(value_pks)
+                return pks
+        return set().union(*(pks for value, pks in chain(groups.items(), unhashable) if check(value)))
 
-        return (q & ~Q(pk__in=remove_pks)) | Q(pk__in=add_pks), created_pks
+    @staticmethod
+    def _get_pk_values(pks):
+        """
+        Get all values a foreign key can have in a value index for these primary keys given as strings.
+        Existing pks can be stored as int or as str, created pks are always str.
+        """
+        return tuple(chain(pks, (int(pk) for pk in pks if pk.isdigit())))
 
     def _filter_kwarg(self, filter_name, filter_value):
         """
@@ -454,7 +483,8 @@ class BaseQueryWrapper(BaseWrapper):
                 existing_pks = tuple(pk for pk in filter_value if not is_created_pk(pk))
                 q = Q(**{field_name+'__pk__in': existing_pks})
                 filter_value = tuple(str(pk) for pk in filter_value)
-                return self._filter_values(q, field_name, lambda val: str(val) in filter_value)
+                return self._filter_values(q, field_name, lambda val: str(val) in filter_value,
+                                           values=self._get_pk_values(filter_value))
 
             if segments:
                 # wo don't do multi-level lookups
@@ -467,7 +497,8 @@ class BaseQueryWrapper(BaseWrapper):
                 elif filter_value is None or int(filter_value) in self._changeset.deleted_existing.get(rel_model, ()):
                     return Q(pk__in=()), set()
                 filter_value = str(filter_value)
-                return self._filter_values(q, field_name, lambda val: str(val) == filter_value)
+                return self._filter_values(q, field_name, lambda val: str(val) == filter_value,
+                                           values=self._get_pk_values((filter_value, )))
 
             if filter_type == 'isnull':
                 # foreign_obj__isnull
@@ -577,7 +608,7 @@ class BaseQueryWrapper(BaseWrapper):
         if not field.is_relation:
             if not segments:
                 # field=
-                return self._filter_values(q, field_name, lambda val: val == filter_value)
+                return self._filter_values(q, field_name, lambda val: val == filter_value, values=(filter_value, ))
 
             filter_type = segments.pop(0)
 
@@ -587,12 +618,24 @@ class BaseQueryWrapper(BaseWrapper):
 
             if filter_type == 'in':
                 # field__in
-                return self._filter_values(q, field_name, lambda val: val in filter_value)
+                return self._filter_values(q, field_name, lambda val: val in filter_value, values=filter_value)
 
             if filter_type == 'lt':
                 # field__lt
                 return self._filter_values(q, field_name, lambda val: val < filter_value)
 
+            if filter_type == 'lte':
+                # field__lte
+                return self._filter_values(q, field_name, lambda val: val <= filter_value)
+
+            if filter_type == 'gt':
+                # field__gt
+                return self._filter_values(q, field_name, lambda val: val > filter_value)
+
+            if filter_type == 'gte':
+                # field__gte
+                return self._filter_values(q, field_name, lambda val: val >= filter_value)
+
             raise NotImplementedError
 
         raise NotImplementedError('cannot filter %s by %s (%s)' % (model, filter_name, field))
@@ -634,6 +677,13 @@ class BaseQueryWrapper(BaseWrapper):
     def exclude(self, *args, **kwargs):
         return self._filter_or_exclude(True, *args, **kwargs)
 
+    @get_queryset
+    def intersecting_bbox(self, bounds):
+        """
+        Same as GeometryQuerySet.intersecting_bbox(), but through filter() so created objects are checked too.
+        """
+        return self.filter(**self._obj.model.bounds_filter(bounds))
+
     @get_queryset
     def count(self):
         return self._obj.count()+len(tuple(self._get_created_objects(get_foreign_objects=False)))
@@ -1,9 +1,10 @@
 import mimetypes
 import operator
 from functools import reduce
+from itertools import chain
 
 from django.db.models import Prefetch, Q
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified
 from django.shortcuts import redirect
 from django.utils.translation import ugettext_lazy as _
 from rest_framework.decorators import detail_route, list_route
@@ -12,12 +13,13 @@ from rest_framework.mixins import RetrieveModelMixin
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ReadOnlyModelViewSet
 
-from c3nav.mapdata.models import Building, Door, Hole, LocationGroup, Source, Space
+from c3nav.mapdata.models import Building, Door, Hole, LocationGroup, MapUpdate, Source, Space
 from c3nav.mapdata.models.geometry.level import LevelGeometryMixin
 from c3nav.mapdata.models.geometry.space import POI, Area, Column, LineObstacle, Obstacle, SpaceGeometryMixin, Stair
 from c3nav.mapdata.models.level import Level
 from c3nav.mapdata.models.locations import (Location, LocationGroupCategory, LocationRedirect, LocationSlug,
                                             SpecificLocation)
+from c3nav.mapdata.render.base import get_level_svg
 from c3nav.mapdata.utils.models import get_submodels
 
 
@@ -95,9 +97,17 @@ class LevelViewSet(MapdataViewSet):
         return self.list_types(get_submodels(LevelGeometryMixin))
 
     @detail_route(methods=['get'])
-    def svg(self, requests, pk=None):
+    def svg(self, request, pk=None):
         level = self.get_object()
-        response = HttpResponse(level.render_svg(), 'image/svg+xml')
+        cache_key = MapUpdate.cache_key()
+        etag = '"%s"' % cache_key
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            return HttpResponseNotModified()
+
+        response = HttpResponse(get_level_svg(level, cache_key), 'image/svg+xml')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
         return response
 
 
@@ -198,6 +208,27 @@ class LocationViewSet(RetrieveModelMixin, GenericViewSet):
 
         return queryset
 
+    def get_locations(self, detailed=False, subconditions=None, group=None):
+        """
+        Get typed location objects ordered by id, using one query per location model
+        (plus one prefetch query for the groups and their categories if detailed is set).
+        """
+        querysets = []
+        for model in get_submodels(Location):
+            if group is not None and not hasattr(model, 'groups'):
+                continue
+            queryset = model.objects.all()
+            if subconditions:
+                queryset = queryset.filter(reduce(operator.or_, (Q(**{name: value})
+                                                                 for name, value in subconditions.items())))
+            if group is not None:
+                queryset = queryset.filter(groups=group)
+            if detailed:
+                queryset = optimize_query(queryset)
+            querysets.append(queryset)
+
+        return sorted(chain(*querysets), key=operator.attrgetter('pk'))
+
     def list(self, request, *args, **kwargs):
         detailed = 'detailed' in request.GET
 
@@ -212,9 +243,9 @@ class LocationViewSet(RetrieveModelMixin, GenericViewSet):
             except LocationGroupCategory.DoesNotExist:
                 raise NotFound(detail=_('group not found.'))
 
-        queryset = self.get_queryset(detailed=detailed, subconditions=subconditions, group=group)
+        locations = self.get_locations(detailed=detailed, subconditions=subconditions, group=group)
 
-        return Response([obj.get_child().serialize(include_type=True, detailed=detailed) for obj in queryset])
+        return Response([obj.serialize(include_type=True, detailed=detailed) for obj in locations])
 
     def retrieve(self, request, slug=None, *args, **kwargs):
         result = Location.get_by_slug(slug, self.get_queryset())
@@ -240,17 +271,17 @@ class LocationViewSet(RetrieveModelMixin, GenericViewSet):
         detailed = 'detailed' in request.GET
         search = request.GET.get('s')
 
-        queryset = self.get_queryset(detailed=detailed, subconditions={'can_search': True})
+        locations = self.get_locations(detailed=detailed, subconditions={'can_search': True})
 
         if not search:
-            return Response([obj.get_child().serialize(include_type=True, detailed=detailed) for obj in queryset])
+            return Response([obj.serialize(include_type=True, detailed=detailed) for obj in locations])
 
         words = search.lower().split(' ')[:10]
-        results = queryset
+        results = locations
         for word in words:
             results = [r for r in results if (word in r.title.lower() or (r.slug and word in r.slug.lower()))]
         # todo: rank results
-        return Response([obj.get_child().serialize(include_type=True, detailed=detailed) for obj in results])
+        return Response([obj.serialize(include_type=True, detailed=detailed) for obj in results])
 
 
 class SourceViewSet(MapdataViewSet):
@@ -4,12 +4,12 @@ from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
-from shapely import validation
-from shapely.geometry import LineString, Point, Polygon, mapping, shape
+from shapely import validation, wkb
+from shapely.geometry import LineString, Point, Polygon, shape
 from shapely.geometry.base import BaseGeometry
 
 from c3nav.mapdata.utils.geometry import clean_geometry
-from c3nav.mapdata.utils.json import format_geojson
+from c3nav.mapdata.utils.json import format_geometry, round_geometry
 
 validate_bssid_lines = RegexValidator(regex=r'^([0-9a-f]{2}(:[0-9a-f]{2}){5}(\r?\n[0-9a-f]{2}(:[0-9a-f]{2}){5})*)?$',
                                       message=_('please enter a newline seperated lowercase list of BSSIDs'))
@@ -23,32 +23,52 @@ def validate_geometry(geometry: BaseGeometry):
         raise ValidationError('Invalid geometry: %s' % validation.explain_validity(geometry))
 
 
+def parse_geometry(value):
+    """
+    Load a geometry from GeoJSON text or hex encoded WKB.
+    """
+    if value.startswith('{'):
+        return shape(json.loads(value))
+    # GEOS' own hex reader is a lot slower than decoding the hex string first
+    return wkb.loads(bytes.fromhex(value))
+
+
 class GeometryField(models.TextField):
+    """
+    A shapely geometry, stored as GeoJSON text or as hex encoded WKB (storage='wkb').
+    WKB is loaded by GEOS directly, which is a lot faster for geometries with many vertices.
+    Both formats can always be read, so existing data stays readable after changing the storage.
+    """
     default_validators = [validate_geometry]
 
-    def __init__(self, geomtype=None, default=None):
+    def __init__(self, geomtype=None, default=None, storage='geojson'):
         if geomtype == 'polyline':
             geomtype = 'linestring'
         if geomtype not in (None, 'polygon', 'linestring', 'point'):
             raise ValueError('GeometryField.geomtype has to be None, "polygon", "linestring", "point"')
+        if storage not in ('geojson', 'wkb'):
+            raise ValueError('GeometryField.storage has to be "geojson" or "wkb"')
         self.geomtype = geomtype
+        self.storage = storage
         super().__init__(default=default)
 
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         if self.geomtype is not None:
             kwargs['geomtype'] = self.geomtype
+        if self.storage != 'geojson':
+            kwargs['storage'] = self.storage
         return name, path, args, kwargs
 
     def from_db_value(self, value, expression, connection, context):
         if value is None:
             return value
-        return shape(json.loads(value))
+        return parse_geometry(value)
 
     def to_python(self, value):
         if value is None:
             return None
-        return clean_geometry(shape(json.loads(value)))
+        return clean_geometry(parse_geometry(value))
 
     def get_prep_value(self, value):
         if value is None:
@@ -59,7 +79,9 @@ class GeometryField(models.TextField):
             raise TypeError('Expected LineString instance, got %s instead.' % repr(value))
         elif self.geomtype == 'point' and not isinstance(value, Point):
             raise TypeError('Expected Point instance, got %s instead.' % repr(value))
-        return json.dumps(format_geojson(mapping(value)))
+        if self.storage == 'wkb':
+            return round_geometry(value).wkb_hex
+        return json.dumps(format_geometry(value))
 
 
 class JSONField(models.TextField):
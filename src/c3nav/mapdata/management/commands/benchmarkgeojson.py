@@ -0,0 +1,48 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from shapely.geometry import Point, Polygon, mapping
+
+from c3nav.mapdata.utils.json import format_geojson, format_geometry
+
+
+class Command(BaseCommand):
+    help = 'benchmark rounding and formatting large polygons as geojson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polygons', type=int, default=100, help='number of polygons')
+        parser.add_argument('--vertices', type=int, default=4000, help='vertices per polygon')
+        parser.add_argument('--repeat', type=int, default=5, help='number of runs per implementation')
+
+    def handle(self, *args, **options):
+        resolution = max(options['vertices'] // 8, 1)
+        polygons = []
+        for i in range(options['polygons']):
+            outer = Point(i * 100.123456, i * 7.654321).buffer(40.5, resolution)
+            hole = Point(i * 100.123456, i * 7.654321).buffer(10.25, resolution)
+            polygons.append(Polygon(outer.exterior, (hole.exterior, )))
+
+        for round in (True, False):
+            implementations = (
+                ('format_geojson', lambda geometry: format_geojson(mapping(geometry), round=round)),
+                ('format_geometry', lambda geometry: format_geometry(geometry, round=round)),
+            )
+            results = {}
+            for name, func in implementations:
+                timings = []
+                for i in range(options['repeat']):
+                    start = time.perf_counter()
+                    result = [func(polygon) for polygon in polygons]
+                    timings.append(time.perf_counter() - start)
+                results[name] = (min(timings), json.dumps(result))
+                self.stdout.write('round=%s %s: %.2fms (best of %d)' % (round, name, min(timings)*1000,
+                                                                        options['repeat']))
+
+            if results['format_geojson'][1] != results['format_geometry'][1]:
+                self.stdout.write(self.style.WARNING('round=%s: results differ' % round))
+
+            self.stdout.write('round=%s %d polygons, %d vertices each, speedup: %.2fx' % (
+                round, len(polygons), len(polygons[0].exterior.coords) + len(polygons[0].interiors[0].coords),
+                results['format_geojson'][0] / results['format_geometry'][0]
+            ))
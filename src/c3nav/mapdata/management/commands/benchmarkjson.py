@@ -0,0 +1,86 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.compat import INDENT_SEPARATORS
+from rest_framework.utils.encoders import JSONEncoder
+
+from c3nav.mapdata.utils.json import json_iterencode_reindent
+
+
+def _preencode(data, magic_marker, in_coords=False, in_groups=False):
+    if isinstance(data, dict):
+        data = data.copy()
+        for name, value in tuple(data.items()):
+            if name == 'bounds':
+                data[name] = magic_marker+json.dumps(value)+magic_marker
+            else:
+                data[name] = _preencode(value, magic_marker,
+                                        in_coords=(name == 'coordinates'), in_groups=(name == 'groups'))
+        return data
+    elif isinstance(data, (tuple, list)):
+        if (in_coords and len(data) == 2) or in_groups:
+            return magic_marker+json.dumps(data)+magic_marker
+        else:
+            return tuple(_preencode(value, magic_marker, in_coords) for value in data)
+    else:
+        return data
+
+
+def marker_encode(data, encoder):
+    """
+    The previous implementation: encode with magic markers around compact parts and remove them afterwards.
+    """
+    magic_marker = '***JSON_MAGIC_MARKER***'
+    test_encode = json.dumps(data)
+    while magic_marker in test_encode:
+        magic_marker += '*'
+    result = encoder.encode(_preencode(data, magic_marker))
+    return result.replace('"'+magic_marker, '').replace(magic_marker+'"', '')
+
+
+def streaming_encode(data, encoder):
+    return ''.join(json_iterencode_reindent(data, encoder))
+
+
+class Command(BaseCommand):
+    help = 'benchmark the indented json encoding of all features of a level'
+
+    def add_arguments(self, parser):
+        parser.add_argument('level', type=int, help='level id')
+        parser.add_argument('--repeat', type=int, default=10, help='number of runs per encoder')
+        parser.add_argument('--indent', type=int, default=4, help='indentation')
+
+    def handle(self, *args, **options):
+        from c3nav.mapdata.models import Level
+        from c3nav.mapdata.models.geometry.level import LevelGeometryMixin
+        from c3nav.mapdata.models.geometry.space import SpaceGeometryMixin
+        from c3nav.mapdata.utils.models import get_submodels
+
+        try:
+            level = Level.objects.get(pk=options['level'])
+        except Level.DoesNotExist:
+            raise CommandError('level not found.')
+
+        data = []
+        for model in get_submodels(LevelGeometryMixin):
+            data.extend(obj.serialize(geometry=True) for obj in model.objects.filter(level=level).order_by('id'))
+        for model in get_submodels(SpaceGeometryMixin):
+            data.extend(obj.serialize(geometry=True) for obj in model.objects.filter(space__level=level).order_by('id'))
+
+        encoder = JSONEncoder(indent=options['indent'], separators=INDENT_SEPARATORS)
+        results = {}
+        for name, encode in (('marker', marker_encode), ('streaming', streaming_encode)):
+            timings = []
+            for i in range(options['repeat']):
+                start = time.perf_counter()
+                result = encode(data, encoder)
+                timings.append(time.perf_counter() - start)
+            results[name] = (min(timings), result)
+            self.stdout.write('%s: %.2fms (best of %d, %d bytes)' % (name, min(timings)*1000,
+                                                                     options['repeat'], len(result)))
+
+        if results['marker'][1] != results['streaming'][1]:
+            raise CommandError('encoders returned different results.')
+
+        self.stdout.write('%d features, speedup: %.2fx' % (len(data), results['marker'][0] / results['streaming'][0]))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'render geometries, svgs and tiles for the current map update (done by celery if it is configured)'
+
+    def handle(self, *args, **options):
+        from c3nav.mapdata.tasks import process_map_updates
+        process_map_updates()
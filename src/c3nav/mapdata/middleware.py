@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+
+class AccessMiddleware:
+    """
+    Sets request.c3nav_full_access, whether non-public map data may be shown and used for routing.
+    It is evaluated lazily, so requests that don't need it don't have to load the user.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.c3nav_full_access = SimpleLazyObject(lambda: request.user.is_superuser)
+        return self.get_response(request)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-07-11 12:21
+from __future__ import unicode_literals
+
+import math
+
+from django.db import migrations, models
+
+
+def calculate_bounds(apps, schema_editor):
+    for model_name in ('Building', 'Space', 'Door', 'Column', 'Area', 'Stair', 'Obstacle', 'LineObstacle', 'POI',
+                       'Hole'):
+        model = apps.get_model('mapdata', model_name)
+        for obj in model.objects.all():
+            minx, miny, maxx, maxy = obj.geometry.bounds
+            obj.minx, obj.miny = math.floor(minx*100)/100, math.floor(miny*100)/100
+            obj.maxx, obj.maxy = math.ceil(maxx*100)/100, math.ceil(maxy*100)/100
+            obj.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapdata', '0021_auto_20170710_1916'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='area',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='area',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='area',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='door',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='door',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='door',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='door',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hole',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hole',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hole',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hole',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lineobstacle',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lineobstacle',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lineobstacle',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lineobstacle',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='obstacle',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='obstacle',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='obstacle',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='obstacle',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='poi',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='poi',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='poi',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='poi',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='space',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='space',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='space',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='space',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stair',
+            name='maxx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stair',
+            name='maxy',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stair',
+            name='minx',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='stair',
+            name='miny',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.RunPython(calculate_bounds, migrations.RunPython.noop),
+    ]
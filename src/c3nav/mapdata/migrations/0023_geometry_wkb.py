@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-07-11 13:05
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Value
+
+import c3nav.mapdata.fields
+
+
+def convert_geometries(storage):
+    def convert(apps, schema_editor):
+        for model_name in ('Building', 'Space', 'Door', 'Column', 'Area', 'Stair', 'Obstacle', 'LineObstacle', 'POI',
+                           'Hole'):
+            model = apps.get_model('mapdata', model_name)
+            field = model._meta.get_field('geometry')
+            field = c3nav.mapdata.fields.GeometryField(geomtype=field.geomtype, storage=storage)
+            for obj in model.objects.only('pk', 'geometry'):
+                model.objects.filter(pk=obj.pk).update(geometry=Value(field.get_prep_value(obj.geometry)))
+    return convert
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapdata', '0022_geometry_bounds'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='area',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='building',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='column',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='door',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='hole',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='lineobstacle',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='linestring', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='obstacle',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='poi',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='point', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='space',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='polygon', storage='wkb'),
+        ),
+        migrations.AlterField(
+            model_name='stair',
+            name='geometry',
+            field=c3nav.mapdata.fields.GeometryField(default=None, geomtype='linestring', storage='wkb'),
+        ),
+        migrations.RunPython(convert_geometries('wkb'), convert_geometries('geojson')),
+    ]
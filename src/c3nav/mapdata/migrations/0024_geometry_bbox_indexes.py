@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-07-11 13:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapdata', '0023_geometry_wkb'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_are_minx_7032a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='building',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_bui_minx_ef61ed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='column',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_col_minx_d528b5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='door',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_doo_minx_de3b8f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hole',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_hol_minx_384151_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lineobstacle',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_lin_minx_e672af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obstacle',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_obs_minx_4490ff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='poi',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_poi_minx_87b8a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='space',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_spa_minx_ef4ac1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stair',
+            index=models.Index(fields=['minx', 'miny', 'maxx', 'maxy'], name='mapdata_sta_minx_45d97b_idx'),
+        ),
+    ]
@@ -1,9 +1,20 @@
+import math
 from collections import OrderedDict
 
-from shapely.geometry import Point, mapping
+from django.db import models
+from shapely.geometry import Point
 
 from c3nav.mapdata.models.base import SerializableMixin
-from c3nav.mapdata.utils.json import format_geojson
+from c3nav.mapdata.utils.json import format_geometry
+
+
+class GeometryQuerySet(models.QuerySet):
+    def intersecting_bbox(self, bounds):
+        """
+        Filter for objects whose bounding box intersects the given bounds, see GeometryMixin.bounds_filter().
+        Use it as a cheap prefilter in the database before exact geometry tests.
+        """
+        return self.filter(**self.model.bounds_filter(bounds))
 
 
 class GeometryMixin(SerializableMixin):
@@ -11,9 +22,39 @@ class GeometryMixin(SerializableMixin):
     A map feature with a geometry
     """
     geometry = None
+    minx = models.FloatField(null=True, editable=False)
+    miny = models.FloatField(null=True, editable=False)
+    maxx = models.FloatField(null=True, editable=False)
+    maxy = models.FloatField(null=True, editable=False)
+
+    objects = GeometryQuerySet.as_manager()
 
     class Meta:
         abstract = True
+        indexes = [models.Index(fields=['minx', 'miny', 'maxx', 'maxy'])]
+
+    def recalculate_bounds(self):
+        """
+        Update the stored bounding box of the geometry.
+        The bounds are expanded to 1cm resolution so they still contain the geometry after rounding.
+        """
+        minx, miny, maxx, maxy = self.geometry.bounds
+        self.minx, self.miny = math.floor(minx*100)/100, math.floor(miny*100)/100
+        self.maxx, self.maxy = math.ceil(maxx*100)/100, math.ceil(maxy*100)/100
+
+    @staticmethod
+    def bounds_filter(bounds):
+        """
+        Get filter kwargs that match all objects whose bounding box intersects the given bounds.
+        Useful as a prefilter before exact geometry tests.
+        :param bounds: (minx, miny, maxx, maxy) tuple, as given by geometry.bounds
+        """
+        minx, miny, maxx, maxy = bounds
+        return {'minx__lte': maxx, 'miny__lte': maxy, 'maxx__gte': minx, 'maxy__gte': miny}
+
+    def save(self, *args, **kwargs):
+        self.recalculate_bounds()
+        super().save(*args, **kwargs)
 
     def get_geojson_properties(self, *args, **kwargs) -> dict:
         result = OrderedDict((
@@ -28,11 +69,11 @@ class GeometryMixin(SerializableMixin):
         result = OrderedDict((
             ('type', 'Feature'),
             ('properties', self.get_geojson_properties(instance=instance)),
-            ('geometry', format_geojson(mapping(self.geometry), round=False)),
+            ('geometry', format_geometry(self.geometry, round=False)),
         ))
         original_geometry = getattr(self, 'original_geometry', None)
         if original_geometry:
-            result['original_geometry'] = format_geojson(mapping(original_geometry), round=False)
+            result['original_geometry'] = format_geometry(original_geometry, round=False)
         return result
 
     @classmethod
@@ -51,7 +92,7 @@ class GeometryMixin(SerializableMixin):
     def _serialize(self, geometry=True, **kwargs):
         result = super()._serialize(**kwargs)
         if geometry:
-            result['geometry'] = format_geojson(mapping(self.geometry), round=False)
+            result['geometry'] = format_geometry(self.geometry, round=False)
         return result
 
     def get_shadow_geojson(self):
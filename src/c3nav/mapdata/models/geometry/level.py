@@ -2,7 +2,7 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
 from c3nav.mapdata.fields import GeometryField
-from c3nav.mapdata.models.geometry.base import GeometryMixin
+from c3nav.mapdata.models.geometry.base import GeometryMixin, GeometryQuerySet
 from c3nav.mapdata.models.locations import SpecificLocation
 
 LEVEL_MODELS = []
@@ -11,7 +11,7 @@ LEVEL_MODELS = []
 class LevelGeometryMixin(GeometryMixin):
     level = models.ForeignKey('mapdata.Level', on_delete=models.CASCADE, verbose_name=_('level'))
 
-    class Meta:
+    class Meta(GeometryMixin.Meta):
         abstract = True
 
     def get_geojson_properties(self, *args, instance=None, **kwargs) -> dict:
@@ -36,9 +36,9 @@ class Building(LevelGeometryMixin, models.Model):
     """
     The outline of a building on a specific level
     """
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
 
-    class Meta:
+    class Meta(LevelGeometryMixin.Meta):
         verbose_name = _('Building')
         verbose_name_plural = _('Buildings')
         default_related_name = 'buildings'
@@ -54,11 +54,14 @@ class Space(SpecificLocation, LevelGeometryMixin, models.Model):
         ('escalator', _('escalator')),
         ('elevator', _('elevator')),
     )
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
     category = models.CharField(verbose_name=_('category'), choices=CATEGORIES, default='normal', max_length=16)
     outside = models.BooleanField(default=False, verbose_name=_('only outside of building'))
 
-    class Meta:
+    # the manager of GeometryMixin is not inherited next to the concrete LocationSlug parent
+    objects = GeometryQuerySet.as_manager()
+
+    class Meta(LevelGeometryMixin.Meta):
         verbose_name = _('Space')
         verbose_name_plural = _('Spaces')
         default_related_name = 'spaces'
@@ -85,9 +88,9 @@ class Door(LevelGeometryMixin, models.Model):
     """
     A connection between two spaces
     """
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
 
-    class Meta:
+    class Meta(LevelGeometryMixin.Meta):
         verbose_name = _('Door')
         verbose_name_plural = _('Doors')
         default_related_name = 'doors'
@@ -2,12 +2,12 @@ from collections import OrderedDict
 
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
-from shapely.geometry import CAP_STYLE, JOIN_STYLE, mapping
+from shapely.geometry import CAP_STYLE, JOIN_STYLE
 
 from c3nav.mapdata.fields import GeometryField
-from c3nav.mapdata.models.geometry.base import GeometryMixin
+from c3nav.mapdata.models.geometry.base import GeometryMixin, GeometryQuerySet
 from c3nav.mapdata.models.locations import SpecificLocation
-from c3nav.mapdata.utils.json import format_geojson
+from c3nav.mapdata.utils.json import format_geometry
 
 SPACE_MODELS = []
 
@@ -15,7 +15,7 @@ SPACE_MODELS = []
 class SpaceGeometryMixin(GeometryMixin):
     space = models.ForeignKey('mapdata.Space', on_delete=models.CASCADE, verbose_name=_('space'))
 
-    class Meta:
+    class Meta(GeometryMixin.Meta):
         abstract = True
 
     def _serialize(self, space=True, **kwargs):
@@ -37,9 +37,9 @@ class Column(SpaceGeometryMixin, models.Model):
     """
     An column in a space, also used to be able to create rooms within rooms.
     """
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
 
-    class Meta:
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Column')
         verbose_name_plural = _('Columns')
         default_related_name = 'columns'
@@ -49,10 +49,13 @@ class Area(SpecificLocation, SpaceGeometryMixin, models.Model):
     """
     An area in a space.
     """
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
     stuffed = models.BooleanField(verbose_name=_('stuffed area'), default=False)
 
-    class Meta:
+    # the manager of GeometryMixin is not inherited next to the concrete LocationSlug parent
+    objects = GeometryQuerySet.as_manager()
+
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Area')
         verbose_name_plural = _('Areas')
         default_related_name = 'areas'
@@ -73,9 +76,9 @@ class Stair(SpaceGeometryMixin, models.Model):
     """
     A stair
     """
-    geometry = GeometryField('linestring')
+    geometry = GeometryField('linestring', storage='wkb')
 
-    class Meta:
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Stair')
         verbose_name_plural = _('Stairs')
         default_related_name = 'stairs'
@@ -84,7 +87,7 @@ class Stair(SpaceGeometryMixin, models.Model):
         result = super().to_geojson(*args, **kwargs)
         original_geometry = result['geometry']
         draw = self.geometry.buffer(0.05, join_style=JOIN_STYLE.mitre, cap_style=CAP_STYLE.flat)
-        result['geometry'] = format_geojson(mapping(draw))
+        result['geometry'] = format_geometry(draw)
         result['original_geometry'] = original_geometry
         return result
 
@@ -98,7 +101,7 @@ class Stair(SpaceGeometryMixin, models.Model):
                 ('original_type', self.__class__.__name__.lower()),
                 ('original_id', self.id),
             ))),
-            ('geometry', format_geojson(mapping(shadow), round=False)),
+            ('geometry', format_geometry(shadow, round=False)),
         ))
 
 
@@ -106,9 +109,9 @@ class Obstacle(SpaceGeometryMixin, models.Model):
     """
     An obstacle
     """
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
 
-    class Meta:
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Obstacle')
         verbose_name_plural = _('Obstacles')
         default_related_name = 'obstacles'
@@ -118,10 +121,10 @@ class LineObstacle(SpaceGeometryMixin, models.Model):
     """
     An obstacle that is a line with a specific width
     """
-    geometry = GeometryField('linestring')
+    geometry = GeometryField('linestring', storage='wkb')
     width = models.DecimalField(_('obstacle width'), max_digits=4, decimal_places=2, default=0.15)
 
-    class Meta:
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Line Obstacle')
         verbose_name_plural = _('Line Obstacles')
         default_related_name = 'lineobstacles'
@@ -136,7 +139,7 @@ class LineObstacle(SpaceGeometryMixin, models.Model):
         result = super()._serialize(geometry=geometry, **kwargs)
         result['width'] = float(str(self.width))
         if geometry:
-            result['buffered_geometry'] = format_geojson(mapping(self.buffered_geometry))
+            result['buffered_geometry'] = format_geometry(self.buffered_geometry)
         return result
 
     @property
@@ -146,7 +149,7 @@ class LineObstacle(SpaceGeometryMixin, models.Model):
     def to_geojson(self, *args, **kwargs):
         result = super().to_geojson(*args, **kwargs)
         result['original_geometry'] = result['geometry']
-        result['geometry'] = format_geojson(mapping(self.buffered_geometry))
+        result['geometry'] = format_geometry(self.buffered_geometry)
         return result
 
 
@@ -154,9 +157,12 @@ class POI(SpecificLocation, SpaceGeometryMixin, models.Model):
     """
     An point of interest
     """
-    geometry = GeometryField('point')
+    geometry = GeometryField('point', storage='wkb')
+
+    # the manager of GeometryMixin is not inherited next to the concrete LocationSlug parent
+    objects = GeometryQuerySet.as_manager()
 
-    class Meta:
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Point of Interest')
         verbose_name_plural = _('Points of Interest')
         default_related_name = 'pois'
@@ -168,7 +174,7 @@ class POI(SpecificLocation, SpaceGeometryMixin, models.Model):
     def to_geojson(self, *args, **kwargs):
         result = super().to_geojson(*args, **kwargs)
         result['original_geometry'] = result['geometry']
-        result['geometry'] = format_geojson(mapping(self.buffered_geometry))
+        result['geometry'] = format_geometry(self.buffered_geometry)
         return result
 
 
@@ -176,9 +182,9 @@ class Hole(SpaceGeometryMixin, models.Model):
     """
     A hole in the ground of a space, e.g. for stairs.
     """
-    geometry = GeometryField('polygon')
+    geometry = GeometryField('polygon', storage='wkb')
 
-    class Meta:
+    class Meta(SpaceGeometryMixin.Meta):
         verbose_name = _('Hole')
         verbose_name_plural = _('Holes')
         default_related_name = 'holes'
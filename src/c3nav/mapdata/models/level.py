@@ -59,6 +59,14 @@ class Level(SpecificLocation, models.Model):
     def primary_level_pk(self):
         return self.pk if self.on_top_of_id is None else self.on_top_of_id
 
+    @property
+    def geometries(self):
+        """
+        Derived geometries of this level for the current map update, see LevelGeometries.
+        """
+        from c3nav.mapdata.render.geometry import LevelGeometries
+        return LevelGeometries.get(self)
+
     def _serialize(self, level=True, **kwargs):
         result = super()._serialize(**kwargs)
         result['altitude'] = float(str(self.altitude))
@@ -89,31 +97,43 @@ class Level(SpecificLocation, models.Model):
         ).intersection(space.geometry)
         svg.add_geometry(obstacle_geometries, fill_color='#999999')
 
-    def render_svg(self, effects=True, draw_spaces=None):
+    def get_svg_image(self, effects=True, draw_spaces=None):
         from c3nav.mapdata.models import Source
         bounds = Source.max_bounds()
         svg = SVGImage(bounds=bounds, scale=settings.RENDER_SCALE)
+        self.render(svg, effects=effects, draw_spaces=draw_spaces)
+        return svg
+
+    def render_svg(self, effects=True, draw_spaces=None):
+        return self.get_svg_image(effects=effects, draw_spaces=draw_spaces).get_xml()
 
-        building_geometries = cascaded_union(tuple(b.geometry for b in self.buildings.all()))
+    def render(self, svg, effects=True, draw_spaces=None):
+        """
+        Render this level onto an SVGImage or any other object with the same drawing methods.
+        :param draw_spaces: if not None, only the spaces in this iterable or queryset will be drawn
+        """
+        geometries = self.geometries
 
-        spaces = self.spaces.all().prefetch_related('groups', 'columns', 'holes', 'areas', 'areas__groups',
+        spaces = self.spaces.all().prefetch_related('groups', 'areas', 'areas__groups',
                                                     'stairs', 'obstacles', 'lineobstacles')
+        if draw_spaces is not None:
+            spaces = spaces.filter(pk__in=draw_spaces)
         for space in spaces:
-            if space.outside:
-                space.geometry = space.geometry.difference(building_geometries)
-            columns_geom = cascaded_union(tuple(column.geometry for column in space.columns.all()))
-            holes_geom = cascaded_union(tuple(hole.geometry for hole in space.holes.all()))
-            space.geometry = space.geometry.difference(columns_geom)
-            space.hole_geometries = holes_geom.intersection(space.geometry)
-
-        space_geometries = cascaded_union(tuple(space.geometry for space in spaces))
-        hole_geometries = cascaded_union(tuple(space.hole_geometries for space in spaces))
+            space.geometry = geometries.spaces[space.pk]
+            space.hole_geometries = geometries.space_holes[space.pk]
+
+        if draw_spaces is None:
+            level_geometry = geometries.outline
+            wall_geometry = geometries.walls
+            space_geometries = geometries.all_spaces
+        else:
+            space_geometries = cascaded_union(tuple(space.geometry for space in spaces))
+            hole_geometries = cascaded_union(tuple(space.hole_geometries for space in spaces))
+            level_geometry = cascaded_union((space_geometries, geometries.buildings, geometries.doors))
+            level_geometry = level_geometry.difference(hole_geometries)
+            wall_geometry = geometries.buildings.difference(space_geometries).difference(geometries.doors)
 
         # draw space background
-        doors = self.doors.all()
-        door_geometries = cascaded_union(tuple(d.geometry for d in doors))
-        level_geometry = cascaded_union((space_geometries, building_geometries, door_geometries))
-        level_geometry = level_geometry.difference(hole_geometries)
         level_clip = svg.register_geometry(level_geometry, defid='level', as_clip_path=True)
         svg.add_geometry(fill_color='#d1d1d1', clip_path=level_clip)
 
@@ -124,15 +144,12 @@ class Level(SpecificLocation, models.Model):
         spaces_by_color.pop(None, None)
         spaces_by_color.pop('', None)
         for i, (color, color_spaces) in enumerate(spaces_by_color.items()):
-            geometries = cascaded_union(tuple(space.geometry for space in color_spaces))
-            svg.add_geometry(geometries, fill_color=color)
+            color_geometries = cascaded_union(tuple(space.geometry for space in color_spaces))
+            svg.add_geometry(color_geometries, fill_color=color)
 
         for space in spaces:
             self._render_space_ground(svg, space)
 
-        # calculate walls
-        wall_geometry = building_geometries.difference(space_geometries).difference(door_geometries)
-
         # draw wall shadow
         if effects:
             wall_dilated_geometry = wall_geometry.buffer(0.7, join_style=JOIN_STYLE.mitre)
@@ -146,8 +163,5 @@ class Level(SpecificLocation, models.Model):
         svg.add_geometry(wall_geometry, fill_color='#929292', stroke_color='#333333', stroke_width=0.07)
 
         # draw doors
-        door_geometries = cascaded_union(tuple(d.geometry for d in doors))
-        door_geometries = door_geometries.difference(space_geometries)
+        door_geometries = geometries.doors.difference(space_geometries)
         svg.add_geometry(door_geometries, fill_color='#ffffff', stroke_color='#929292', stroke_width=0.07)
-
-        return svg.get_xml()
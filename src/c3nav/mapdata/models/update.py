@@ -1,3 +1,4 @@
+import time
 from contextlib import contextmanager
 
 from django.conf import settings
@@ -7,6 +8,8 @@ from django.utils.http import int_to_base36
 from django.utils.timezone import make_naive
 from django.utils.translation import ugettext_lazy as _
 
+from c3nav.mapdata.utils import bus as map_update_bus
+
 
 class MapUpdate(models.Model):
     """
@@ -22,15 +25,51 @@ class MapUpdate(models.Model):
         default_related_name = 'mapupdates'
         get_latest_by = 'datetime'
 
+    # the cached last update is refreshed from the database by one process after this many seconds,
+    # everyone else keeps using the cached value until the refresh is done
+    last_update_refresh = 600
+    # every process remembers the last update for this many seconds without asking the cache
+    last_update_memo_ttl = 1
+
+    _last_update_memo = (0, None)
+
     @classmethod
     def last_update(cls):
-        last_update = cache.get('mapdata:last_update', None)
-        if last_update is not None:
+        """
+        Get (pk, datetime) of the latest map update. Never waits for a lock.
+        """
+        map_update_bus.ensure_listener()
+        memo_expires, last_update = cls._last_update_memo
+        if memo_expires > time.monotonic():
             return last_update
-        with cls.lock():
-            last_update = cls.objects.latest()
-            cache.set('mapdata:last_update', (last_update.pk, last_update.datetime), 900)
-        return last_update.pk, last_update.datetime
+
+        cached = cache.get('mapdata:last_update_info', None)
+        if cached is None:
+            last_update = cls._store_last_update(cls.objects.values_list('pk', 'datetime').latest())
+        else:
+            last_update, refresh_after = cached[:2], cached[2]
+            if refresh_after < time.time() and cache.add('mapdata:last_update_info:refresh', True, 60):
+                try:
+                    last_update = cls._store_last_update(cls.objects.values_list('pk', 'datetime').latest())
+                finally:
+                    cache.delete('mapdata:last_update_info:refresh')
+
+        cls._last_update_memo = (time.monotonic() + cls.last_update_memo_ttl, last_update)
+        return last_update
+
+    @classmethod
+    def _store_last_update(cls, last_update):
+        """
+        Store (pk, datetime) of the latest map update in the cache, an older map update never replaces a newer one.
+        """
+        last_update = tuple(last_update)
+        value = last_update + (time.time() + cls.last_update_refresh, )
+        if not cache.add('mapdata:last_update_info', value, cls.last_update_refresh + 300):
+            cached = cache.get('mapdata:last_update_info', None)
+            if cached is not None and cached[0] > last_update[0]:
+                return cached[:2]
+            cache.set('mapdata:last_update_info', value, cls.last_update_refresh + 300)
+        return last_update
 
     @classmethod
     def cache_key(cls):
@@ -47,4 +86,22 @@ class MapUpdate(models.Model):
         if self.pk is not None:
             raise TypeError
         super().save(**kwargs)
-        cache.set('mapdata:last_update', (self.pk, self.datetime), 900)
+        MapUpdate._store_last_update((self.pk, self.datetime))
+        MapUpdate._last_update_memo = (time.monotonic() + self.last_update_memo_ttl, (self.pk, self.datetime))
+
+        transaction.on_commit(lambda: map_update_bus.publish(self.pk))
+
+        if settings.HAS_CELERY:
+            # without celery, tasks run eagerly, which would render everything inside this request.
+            # svgs and geometries are then rendered on first use, tiles with the processmapupdates command.
+            from c3nav.mapdata.tasks import process_map_updates
+            transaction.on_commit(lambda: process_map_updates.delay())
+
+
+@map_update_bus.subscribe
+def forget_last_update(map_update_pk):
+    cached = cache.get('mapdata:last_update_info', None)
+    if cached is not None and cached[0] < map_update_pk:
+        # only if the cache is not shared with the process that created the map update
+        cache.delete('mapdata:last_update_info')
+    MapUpdate._last_update_memo = (0, None)
@@ -0,0 +1,90 @@
+import os
+from contextlib import suppress
+from glob import glob
+
+from django.conf import settings
+
+from c3nav.mapdata.models import Level, MapUpdate
+
+
+def get_render_path(filetype, level, cache_key, *parts):
+    """
+    Get the path of a precomputed render of a level for a specific map update.
+    :param filetype: file extension, e.g. 'svg'
+    :param level: level instance or primary key
+    :param cache_key: result of MapUpdate.cache_key() the render belongs to
+    :param parts: additional name parts to distinguish different renders of the same level
+    """
+    level_pk = level if isinstance(level, int) else level.pk
+    name = '-'.join(('level', str(level_pk)) + parts + (cache_key, ))
+    return os.path.join(settings.RENDER_ROOT, name+'.'+filetype)
+
+
+def _write_atomic(filename, data):
+    """
+    Write data to a file atomically.
+    :param data: bytes or an iterable of bytes chunks, which are written as they are generated
+    """
+    tmp_filename = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp_filename, 'wb') as f:
+        if isinstance(data, bytes):
+            f.write(data)
+        else:
+            f.writelines(data)
+    os.replace(tmp_filename, filename)
+
+
+def _get_map_update_pk(cache_key):
+    return int(cache_key.split('_', 1)[0], 36)
+
+
+def _remove_outdated(filetype, level, cache_key, *parts):
+    """
+    Remove renders for map updates older than the one of cache_key.
+    Only call this from the map update task, renders for newer map updates are never removed.
+    """
+    map_update_pk = _get_map_update_pk(cache_key)
+    for filename in glob(get_render_path(filetype, level, '*', *parts)):
+        render_cache_key = os.path.basename(filename)[:-len(filetype)-1].rsplit('-', 1)[1]
+        if _get_map_update_pk(render_cache_key) < map_update_pk:
+            with suppress(FileNotFoundError):
+                os.remove(filename)
+
+
+def render_level_svg(level, cache_key=None):
+    """
+    Render a level to SVG and store it in the render cache.
+    The SVG document is written in chunks, it is never held in memory as a whole.
+    """
+    if cache_key is None:
+        cache_key = MapUpdate.cache_key()
+    svg = level.get_svg_image()
+    _write_atomic(get_render_path('svg', level, cache_key), (chunk.encode() for chunk in svg.iter_xml()))
+
+
+def get_level_svg(level, cache_key=None):
+    """
+    Get the SVG data of a level for the current map update.
+    The data is read from the render cache and only rendered on a cache miss.
+    """
+    if cache_key is None:
+        cache_key = MapUpdate.cache_key()
+    filename = get_render_path('svg', level, cache_key)
+    try:
+        with open(filename, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    render_level_svg(level, cache_key)
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def render_all_levels():
+    """
+    Render all levels for the current map update. Renders for previous map updates are removed.
+    """
+    cache_key = MapUpdate.cache_key()
+    for level in Level.objects.all():
+        render_level_svg(level, cache_key)
+        _remove_outdated('svg', level, cache_key)
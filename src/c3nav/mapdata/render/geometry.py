@@ -0,0 +1,143 @@
+import pickle
+
+from shapely import wkb
+from shapely.geometry import GeometryCollection
+from shapely.ops import cascaded_union
+
+from c3nav.mapdata.models import Level, MapUpdate
+from c3nav.mapdata.render.base import _remove_outdated, _write_atomic, get_render_path
+from c3nav.mapdata.utils import bus as map_update_bus
+
+
+class LevelGeometries:
+    """
+    Derived geometries of a level, computed once per map update and shared by all outputs.
+    buildings: union of all buildings
+    building_parts: building geometries by pk, without holes
+    spaces: space geometries by pk, without columns and (if outside) without buildings
+    space_holes: holes by space pk, intersected with their space
+    all_spaces: union of all spaces
+    holes: union of all space holes
+    doors: union of all doors
+    walls: buildings without spaces and doors
+    accessible: union of all spaces without holes
+    outline: union of spaces, buildings and doors without holes
+    """
+    single_fields = ('buildings', 'all_spaces', 'holes', 'doors', 'walls', 'accessible', 'outline')
+    dict_fields = ('building_parts', 'spaces', 'space_holes')
+
+    _cache = {}
+
+    def __init__(self):
+        self.buildings = GeometryCollection()
+        self.building_parts = {}
+        self.spaces = {}
+        self.space_holes = {}
+        self.all_spaces = GeometryCollection()
+        self.holes = GeometryCollection()
+        self.doors = GeometryCollection()
+        self.walls = GeometryCollection()
+        self.accessible = GeometryCollection()
+        self.outline = GeometryCollection()
+
+    @classmethod
+    def build(cls, level):
+        """
+        Compute the derived geometries of a level from the database.
+        """
+        geometries = cls()
+        buildings = tuple(level.buildings.all())
+        geometries.buildings = cascaded_union(tuple(building.geometry for building in buildings))
+
+        for space in level.spaces.all().prefetch_related('columns', 'holes'):
+            geometry = space.geometry
+            if space.outside:
+                geometry = geometry.difference(geometries.buildings)
+            geometry = geometry.difference(cascaded_union(tuple(column.geometry for column in space.columns.all())))
+            geometries.spaces[space.pk] = geometry
+            holes_geom = cascaded_union(tuple(hole.geometry for hole in space.holes.all()))
+            geometries.space_holes[space.pk] = holes_geom.intersection(geometry)
+
+        geometries.all_spaces = cascaded_union(tuple(geometries.spaces.values()))
+        geometries.holes = cascaded_union(tuple(geometries.space_holes.values()))
+        geometries.doors = cascaded_union(tuple(door.geometry for door in level.doors.all()))
+        geometries.walls = geometries.buildings.difference(geometries.all_spaces).difference(geometries.doors)
+        geometries.accessible = geometries.all_spaces.difference(geometries.holes)
+        geometries.outline = cascaded_union((geometries.all_spaces, geometries.buildings,
+                                             geometries.doors)).difference(geometries.holes)
+        geometries.building_parts = {building.pk: building.geometry.difference(geometries.holes)
+                                     for building in buildings}
+        return geometries
+
+    def serialize(self):
+        return {
+            **{name: getattr(self, name).wkb for name in self.single_fields},
+            **{name: {pk: geometry.wkb for pk, geometry in getattr(self, name).items()} for name in self.dict_fields},
+        }
+
+    @classmethod
+    def unserialize(cls, data):
+        geometries = cls()
+        for name in cls.single_fields:
+            setattr(geometries, name, wkb.loads(data[name]))
+        for name in cls.dict_fields:
+            setattr(geometries, name, {pk: wkb.loads(geometry) for pk, geometry in data[name].items()})
+        return geometries
+
+    @classmethod
+    def rebuild(cls, level, cache_key=None):
+        """
+        Compute the derived geometries of a level and store them for a specific map update.
+        """
+        if cache_key is None:
+            cache_key = MapUpdate.cache_key()
+        geometries = cls.build(level)
+        _write_atomic(get_render_path('geometries', level, cache_key), pickle.dumps(geometries.serialize()))
+        cls._remember(level.pk, cache_key, geometries)
+        return geometries
+
+    @classmethod
+    def _remember(cls, level_pk, cache_key, geometries):
+        cls._cache = {key: value for key, value in cls._cache.items() if key[1] == cache_key}
+        cls._cache[(level_pk, cache_key)] = geometries
+
+    @classmethod
+    def get(cls, level, cache_key=None):
+        """
+        Get the derived geometries of a level for the current map update.
+        They are kept in memory and read from the render cache, and only computed on a cache miss.
+        """
+        if cache_key is None:
+            cache_key = MapUpdate.cache_key()
+        level_pk = level if isinstance(level, int) else level.pk
+        geometries = cls._cache.get((level_pk, cache_key), None)
+        if geometries is not None:
+            return geometries
+
+        try:
+            with open(get_render_path('geometries', level_pk, cache_key), 'rb') as f:
+                geometries = cls.unserialize(pickle.load(f))
+        except FileNotFoundError:
+            if isinstance(level, int):
+                level = Level.objects.get(pk=level)
+            return cls.rebuild(level, cache_key)
+
+        cls._remember(level_pk, cache_key, geometries)
+        return geometries
+
+
+def rebuild_all_level_geometries():
+    """
+    Compute the derived geometries of all levels for the current map update.
+    Geometries for previous map updates are removed.
+    """
+    cache_key = MapUpdate.cache_key()
+    for level in Level.objects.all():
+        LevelGeometries.rebuild(level, cache_key)
+        _remove_outdated('geometries', level, cache_key)
+
+
+@map_update_bus.subscribe
+def forget_level_geometries(map_update_pk):
+    # geometries of the new map update have a different cache key, the old ones won't be used anymore
+    LevelGeometries._cache = {}
@@ -0,0 +1,325 @@
+import math
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from glob import glob
+from io import BytesIO
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageColor, ImageDraw, ImageFilter
+from shapely.geometry import GeometryCollection, LineString, MultiLineString, MultiPolygon, Polygon, box
+
+from c3nav.mapdata.models import Level, MapUpdate, Source
+
+TILE_SIZE = 256
+ACCESS_TYPES = ('public', 'full')
+RENDER_TIMEOUT = 86400
+
+Layer = namedtuple('Layer', ('geometry', 'fill', 'stroke', 'stroke_width', 'blur'))
+
+
+def _parse_color(color, opacity):
+    """
+    Get an (r, g, b, a) tuple for a CSS color, a is a float between 0 and 1.
+    """
+    if not color or color == 'none':
+        return None
+    match = re.match(r'^rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([0-9.]+)\s*\)$', color)
+    if match:
+        r, g, b, a = match.groups()
+        return int(r), int(g), int(b), float(a) * opacity
+    return ImageColor.getrgb(color)[:3] + (opacity, )
+
+
+class TileLayers:
+    """
+    Collects the drawing operations of a level render so they can be rasterized tile by tile.
+    Has the same drawing methods as SVGImage, so it can be passed to Level.render().
+    """
+    def __init__(self, bounds):
+        (self.bottom, self.left), (self.top, self.right) = bounds
+        self.width = self.right-self.left
+        self.height = self.top-self.bottom
+        self.geometries = {}
+        self.layers = []
+
+    def register_geometry(self, geometry, defid=None, as_clip_path=False, comment=None):
+        if defid is None:
+            defid = 's'+str(len(self.geometries))
+        self.geometries[defid] = geometry
+        return defid
+
+    def add_geometry(self, geometry=None, fill_color=None, fill_opacity=None, opacity=None, filter=None,
+                     stroke_width=0.0, stroke_color=None, stroke_opacity=None, stroke_linejoin=None, clip_path=None):
+        if geometry is None:
+            geometry = box(self.left, self.bottom, self.right, self.top)
+        elif isinstance(geometry, str):
+            geometry = self.geometries[geometry]
+        elif not geometry:
+            return
+        if clip_path:
+            geometry = geometry.intersection(self.geometries[clip_path])
+        if geometry.is_empty:
+            return
+
+        opacity = 1 if opacity is None else opacity
+        fill = _parse_color(fill_color, opacity * (1 if fill_opacity is None else fill_opacity))
+        stroke = _parse_color(stroke_color, opacity * (1 if stroke_opacity is None else stroke_opacity))
+        if stroke is None or not stroke_width:
+            stroke, stroke_width = None, 0
+        self.layers.append(Layer(geometry, fill, stroke, stroke_width, 0.7 if filter == 'wallblur' else 0))
+
+    def get_zoom_levels(self):
+        """
+        Zoom level z means 2**z pixels per meter. The smallest zoom level shows the whole map in one tile.
+        """
+        max_zoom = math.ceil(math.log2(settings.RENDER_SCALE))
+        min_zoom = min(max_zoom, math.floor(math.log2(TILE_SIZE / max(self.width, self.height))))
+        return range(min_zoom, max_zoom+1)
+
+    def get_tile_count(self, zoom):
+        scale = 2 ** zoom
+        return math.ceil(self.width * scale / TILE_SIZE), math.ceil(self.height * scale / TILE_SIZE)
+
+    def iter_tiles(self):
+        for zoom in self.get_zoom_levels():
+            width, height = self.get_tile_count(zoom)
+            for x in range(width):
+                for y in range(height):
+                    yield zoom, x, y
+
+    def _draw_geometry(self, fill_draw, stroke_draw, geometry, transform, stroke_width):
+        if isinstance(geometry, Polygon):
+            if fill_draw is not None:
+                fill_draw.polygon(transform(geometry.exterior), fill=255)
+                for interior in geometry.interiors:
+                    fill_draw.polygon(transform(interior), fill=0)
+            if stroke_draw is not None:
+                for ring in (geometry.exterior, ) + tuple(geometry.interiors):
+                    stroke_draw.line(transform(ring), fill=255, width=stroke_width)
+        elif isinstance(geometry, LineString):
+            if stroke_draw is not None:
+                stroke_draw.line(transform(geometry), fill=255, width=stroke_width)
+        elif isinstance(geometry, (MultiPolygon, MultiLineString, GeometryCollection)):
+            for subgeometry in geometry.geoms:
+                self._draw_geometry(fill_draw, stroke_draw, subgeometry, transform, stroke_width)
+
+    def render_tile(self, zoom, x, y):
+        """
+        Rasterize one tile. Returns None if the tile is empty.
+        """
+        scale = 2 ** zoom
+        size = TILE_SIZE / scale
+        minx = self.left + x * size
+        maxy = self.top - y * size
+
+        margin = max((math.ceil(3 * layer.blur * scale) for layer in self.layers), default=0)
+        canvas_size = (TILE_SIZE + 2 * margin, ) * 2
+        margin_size = margin / scale
+        tile_box = box(minx - margin_size, maxy - size - margin_size, minx + size + margin_size, maxy + margin_size)
+
+        def transform(geometry):
+            coords = np.array(geometry.coords)[:, :2]
+            coords = (coords - (minx - margin_size, maxy + margin_size)) * (scale, -scale)
+            return coords.ravel().tolist()
+
+        image = Image.new('RGBA', canvas_size, (0, 0, 0, 0))
+        empty = True
+        for layer in self.layers:
+            stroke_width = max(1, round(layer.stroke_width * scale))
+            stroke_margin = stroke_width / scale
+            if not layer.geometry.intersects(tile_box.buffer(stroke_margin + 3 * layer.blur)):
+                continue
+            geometry = layer.geometry.intersection(tile_box.buffer(stroke_margin + 3 * layer.blur))
+
+            for color, is_fill in ((layer.fill, True), (layer.stroke, False)):
+                if color is None:
+                    continue
+                mask = Image.new('L', canvas_size, 0)
+                draw = ImageDraw.Draw(mask)
+                self._draw_geometry(draw if is_fill else None, None if is_fill else draw,
+                                    geometry, transform, stroke_width)
+                if layer.blur:
+                    mask = mask.filter(ImageFilter.GaussianBlur(layer.blur * scale))
+                alpha = color[3]
+                mask = mask.point(lambda value: int(value * alpha))
+                if not mask.getbbox():
+                    continue
+                color_image = Image.new('RGBA', canvas_size, color[:3] + (0, ))
+                color_image.putalpha(mask)
+                image = Image.alpha_composite(image, color_image)
+                empty = False
+
+        if empty:
+            return None
+        return image.crop((margin, margin, margin + TILE_SIZE, margin + TILE_SIZE))
+
+
+def get_tiles_path(level, access, cache_key):
+    """
+    Get the path of the tile pyramid of a level for a map update.
+    This is a symlink to the directory the pyramid was rendered to, so it can be replaced atomically.
+    """
+    level_pk = level if isinstance(level, int) else level.pk
+    return os.path.join(settings.RENDER_ROOT, 'tiles', 'level-%d-%s-%s' % (level_pk, access, cache_key))
+
+
+def get_tile_path(tiles_path, zoom, x, y):
+    return os.path.join(tiles_path, str(zoom), '%d-%d.png' % (x, y))
+
+
+_worker_layers = None
+_worker_path = None
+
+
+def _init_worker(layers, path):
+    global _worker_layers, _worker_path
+    _worker_layers = layers
+    _worker_path = path
+
+
+def _render_tile(tile):
+    zoom, x, y = tile
+    image = _worker_layers.render_tile(zoom, x, y)
+    if image is not None:
+        image.save(os.path.join(_worker_path, str(zoom), '%d-%d.png' % (x, y)), 'PNG')
+
+
+def get_level_layers(level, access):
+    layers = TileLayers(Source.max_bounds())
+    level.render(layers, draw_spaces=level.spaces.filter(public=True) if access == 'public' else None)
+    return layers
+
+
+def render_level_tiles(level, access, cache_key=None):
+    """
+    Render the PNG tile pyramid of a level for an access type and store it in the render cache.
+    Tiles are rendered in parallel worker processes. Empty tiles are not stored.
+    The pyramid is rendered into a new directory and then published by replacing the symlink to it,
+    so readers never see a partially rendered or removed pyramid. Tile pyramids for previous map updates are removed.
+    """
+    if cache_key is None:
+        cache_key = MapUpdate.cache_key()
+    layers = get_level_layers(level, access)
+
+    path = get_tiles_path(level, access, cache_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    render_path = tempfile.mkdtemp(prefix=os.path.basename(path)+'.', suffix='.render', dir=os.path.dirname(path))
+    for zoom in layers.get_zoom_levels():
+        os.makedirs(os.path.join(render_path, str(zoom)), exist_ok=True)
+
+    tiles = tuple(layers.iter_tiles())
+    if multiprocessing.current_process().daemon or settings.RENDER_PROCESSES == 1:
+        # daemonic processes (e.g. celery workers) are not allowed to have children
+        _init_worker(layers, render_path)
+        for tile in tiles:
+            _render_tile(tile)
+    else:
+        with multiprocessing.Pool(settings.RENDER_PROCESSES, initializer=_init_worker,
+                                  initargs=(layers, render_path)) as pool:
+            pool.map(_render_tile, tiles, chunksize=8)
+    os.chmod(render_path, 0o755)
+
+    if os.path.isdir(path) and not os.path.islink(path):
+        # pyramids used to be stored directly at this path
+        shutil.rmtree(path, ignore_errors=True)
+    tmp_link = '%s.%d.link' % (path, os.getpid())
+    os.symlink(os.path.basename(render_path), tmp_link)
+    os.replace(tmp_link, path)
+
+    # remove pyramids that are no longer linked, e.g. from previous map updates or replaced by this render
+    _remove_outdated_tiles(level, access, keep=(path, render_path))
+
+
+def _remove_outdated_tiles(level, access, keep):
+    for outdated_path in glob(get_tiles_path(level, access, '*')):
+        if outdated_path in keep or outdated_path.endswith('.link'):
+            continue
+        if os.path.islink(outdated_path):
+            os.remove(outdated_path)
+        elif outdated_path.endswith('.render') and _is_rendering(outdated_path):
+            # another render that has not been published yet
+            continue
+        else:
+            shutil.rmtree(outdated_path, ignore_errors=True)
+
+
+def _is_rendering(render_path):
+    # mkdtemp() creates render directories with mode 0700, they are made readable once they are complete.
+    # renders that did not finish within a day are assumed to have crashed.
+    stat = os.stat(render_path)
+    return stat.st_mode & 0o777 == 0o700 and time.time() - stat.st_mtime < RENDER_TIMEOUT
+
+
+_empty_tile = None
+
+
+def get_empty_tile():
+    global _empty_tile
+    if _empty_tile is None:
+        f = BytesIO()
+        Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0)).save(f, 'PNG')
+        _empty_tile = f.getvalue()
+    return _empty_tile
+
+
+def get_tile_counts(cache_key):
+    """
+    Get the number of tiles in x and y direction by zoom level for a map update.
+    They only change with the map bounds, so they are cached per map update instead of querying every time.
+    """
+    cache_key_tiles = 'mapdata:tile_counts:'+cache_key
+    tile_counts = cache.get(cache_key_tiles, None)
+    if tile_counts is None:
+        layers = TileLayers(Source.max_bounds())
+        tile_counts = {zoom: layers.get_tile_count(zoom) for zoom in layers.get_zoom_levels()}
+        cache.set(cache_key_tiles, tile_counts, 86400)
+    return tile_counts
+
+
+def get_level_tile(level, access, zoom, x, y, cache_key=None):
+    """
+    Get the PNG data of a tile for the current map update from the render cache.
+    Tiles are only rendered by the process_map_updates task, never on request.
+    Returns None if the tile does not exist or the tile pyramid has not been rendered yet.
+    """
+    if cache_key is None:
+        cache_key = MapUpdate.cache_key()
+    tile_counts = get_tile_counts(cache_key)
+    if zoom not in tile_counts:
+        return None
+    width, height = tile_counts[zoom]
+    if x >= width or y >= height:
+        return None
+
+    path = get_tiles_path(level, access, cache_key)
+    try:
+        # resolve the symlink once, so the whole read uses the same render
+        tiles_path = os.path.join(os.path.dirname(path), os.readlink(path))
+    except FileNotFoundError:
+        return None
+
+    try:
+        with open(get_tile_path(tiles_path, zoom, x, y), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        if not os.path.isdir(tiles_path):
+            # the pyramid was removed in the meantime
+            return None
+        return get_empty_tile()
+
+
+def render_all_tiles():
+    """
+    Render the tile pyramids of all levels for the current map update.
+    """
+    cache_key = MapUpdate.cache_key()
+    for level in Level.objects.all():
+        for access in ACCESS_TYPES:
+            render_level_tiles(level, access, cache_key)
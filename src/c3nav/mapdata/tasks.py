@@ -0,0 +1,11 @@
+from c3nav.celery import app
+
+
+@app.task()
+def process_map_updates():
+    from c3nav.mapdata.render.base import render_all_levels
+    from c3nav.mapdata.render.geometry import rebuild_all_level_geometries
+    from c3nav.mapdata.render.tiles import render_all_tiles
+    rebuild_all_level_geometries()
+    render_all_levels()
+    render_all_tiles()
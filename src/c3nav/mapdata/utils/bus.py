@@ -0,0 +1,120 @@
+"""
+Broadcast new map updates to all processes, so they can drop their in-process caches right away.
+Uses redis pub/sub if redis is configured. Otherwise, the pk of the last map update is written to a file in the
+data directory, which every process watches in a background thread.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('c3nav')
+
+REDIS_CHANNEL = 'c3nav:mapupdates'
+FILE_PATH = os.path.join(settings.DATA_DIR, 'last_map_update')
+FILE_POLL_INTERVAL = 1
+RECONNECT_INTERVAL = 5
+
+_subscribers = []
+_last_map_update = 0
+_listener_pid = None
+_lock = threading.Lock()
+
+
+def subscribe(func):
+    """
+    Call func with the pk of every new map update. Can be used as a decorator.
+    Subscribers are called from a background thread and should only drop or replace cached data.
+    """
+    _subscribers.append(func)
+    return func
+
+
+def publish(map_update_pk):
+    """
+    Tell all processes about a new map update. Should only be called once it has been committed.
+    """
+    _notify(map_update_pk)
+    if settings.HAS_REDIS:
+        from django_redis import get_redis_connection
+        get_redis_connection('redis').publish(REDIS_CHANNEL, str(map_update_pk))
+    else:
+        tmp_path = '%s.%d.tmp' % (FILE_PATH, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(str(map_update_pk))
+        os.replace(tmp_path, FILE_PATH)
+
+
+def ensure_listener():
+    """
+    Start listening for map updates in this process, if it doesn't yet. Cheap enough to call on every request.
+    The pid is checked because forked processes don't inherit the listener thread.
+    """
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+    target = _listen_redis if settings.HAS_REDIS else _watch_file
+    threading.Thread(target=target, name='c3nav-mapupdates', daemon=True).start()
+
+
+def _notify(map_update_pk):
+    global _last_map_update
+    with _lock:
+        if map_update_pk <= _last_map_update:
+            # already seen, e.g. published by this process and then received again
+            return
+        _last_map_update = map_update_pk
+    for func in _subscribers:
+        try:
+            func(map_update_pk)
+        except Exception:
+            logger.exception('map update subscriber %r failed' % func)
+
+
+def _listen_redis():
+    from django_redis import get_redis_connection
+    while True:
+        try:
+            pubsub = get_redis_connection('redis').pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REDIS_CHANNEL)
+            for message in pubsub.listen():
+                _notify(int(message['data']))
+        except Exception:
+            logger.exception('listening for map updates failed, reconnecting')
+        time.sleep(RECONNECT_INTERVAL)
+
+
+def _read_file():
+    try:
+        with open(FILE_PATH) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
+
+
+def _get_file_mtime():
+    try:
+        return os.stat(FILE_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _watch_file():
+    global _last_map_update
+    last_mtime = _get_file_mtime()
+    with _lock:
+        # map updates from before this process started listening are nothing new
+        _last_map_update = max(_last_map_update, _read_file())
+    while True:
+        time.sleep(FILE_POLL_INTERVAL)
+        mtime = _get_file_mtime()
+        if mtime != last_mtime:
+            last_mtime = mtime
+            _notify(_read_file())
@@ -1,37 +1,85 @@
 import json
 from collections import OrderedDict
+from itertools import chain
+from math import inf
 
+import numpy as np
+from shapely.geometry import Point, Polygon, mapping
 
-def _preencode(data, magic_marker, in_coords=False, in_groups=False):
-    if isinstance(data, dict):
-        data = data.copy()
-        for name, value in tuple(data.items()):
-            if name == 'bounds':
-                data[name] = magic_marker+json.dumps(value)+magic_marker
-            else:
-                data[name] = _preencode(value, magic_marker,
-                                        in_coords=(name == 'coordinates'), in_groups=(name == 'groups'))
-        return data
-    elif isinstance(data, (tuple, list)):
-        if (in_coords and len(data) == 2) or in_groups:
-            return magic_marker+json.dumps(data)+magic_marker
+
+def json_iterencode_reindent(data, encoder):
+    """
+    Encode data as indented json in a single pass, yielding string chunks (one per item of a top level list).
+    Coordinate pairs, bounds and groups are written compactly on a single line.
+    The encoder is used for everything that isn't a dict, list or tuple.
+    """
+    indent = encoder.indent
+    if not isinstance(indent, str):
+        indent = ' ' * (indent or 0)
+    item_separator, key_separator = encoder.item_separator, encoder.key_separator
+    compact_encode = type(encoder)(ensure_ascii=encoder.ensure_ascii).encode
+    encode = encoder.encode
+    default = encoder.default
+    chunks = []
+    write = chunks.append
+
+    def _encode(value, newline, in_coords=False, in_groups=False):
+        if isinstance(value, dict):
+            if not value:
+                write('{}')
+                return
+            inner_newline = newline + indent
+            separator = '{'
+            for name, item in value.items():
+                if not isinstance(name, str):
+                    name = json.dumps(name).strip('"')
+                write(separator + inner_newline + encode(name) + key_separator)
+                separator = item_separator
+                if name == 'bounds':
+                    write(compact_encode(item))
+                else:
+                    _encode(item, inner_newline, in_coords=(name == 'coordinates'), in_groups=(name == 'groups'))
+            write(newline + '}')
+        elif isinstance(value, (list, tuple)):
+            if in_coords and len(value) == 2:
+                x, y = value
+                if type(x) is float and type(y) is float and abs(x) < inf and abs(y) < inf:
+                    # fast path for coordinate pairs, same output as the json encoder
+                    write('[%r, %r]' % (x, y))
+                else:
+                    write(compact_encode(value))
+                return
+            if in_groups:
+                write(compact_encode(value))
+                return
+            if not value:
+                write('[]')
+                return
+            inner_newline = newline + indent
+            separator = '['
+            for item in value:
+                write(separator + inner_newline)
+                separator = item_separator
+                _encode(item, inner_newline, in_coords)
+            write(newline + ']')
+        elif value is None or isinstance(value, (str, int, float)):
+            write(encode(value))
         else:
-            return tuple(_preencode(value, magic_marker, in_coords) for value in data)
-    else:
-        return data
+            _encode(default(value), newline, in_coords, in_groups)
 
+    if not isinstance(data, (list, tuple)) or not data:
+        _encode(data, '\n')
+        yield ''.join(chunks)
+        return
 
-def json_encoder_reindent(method, data, *args, **kwargs):
-    magic_marker = '***JSON_MAGIC_MARKER***'
-    test_encode = json.dumps(data)
-    while magic_marker in test_encode:
-        magic_marker += '*'
-    result = method(_preencode(data, magic_marker), *args, **kwargs)
-    if type(result) == str:
-        return result.replace('"'+magic_marker, '').replace(magic_marker+'"', '')
-    else:
-        magic_marker = magic_marker.encode()
-        return result.replace(b'"'+magic_marker, b'').replace(magic_marker+b'"', b'')
+    separator = '['
+    for item in data:
+        write(separator + '\n' + indent)
+        separator = item_separator
+        _encode(item, '\n' + indent)
+        yield ''.join(chunks)
+        chunks.clear()
+    yield '\n]'
 
 
 def format_geojson(data, round=True):
@@ -52,3 +100,71 @@ def round_coordinates(data):
         return tuple(round_coordinates(item) for item in data)
     else:
         return round(data, 2)
+
+
+def format_geometry(geometry, round=True):
+    """
+    Same result as format_geojson(mapping(geometry)), but reads the coordinate arrays of the shapely geometry
+    directly and rounds them with numpy instead of rounding every number on its own.
+    """
+    if not round:
+        # nothing to round, shapely's own conversion is faster here
+        return format_geojson(mapping(geometry), round=False)
+    geom_type = type(geometry).__name__
+    if geom_type == 'GeometryCollection':
+        return OrderedDict((
+            ('type', geom_type),
+            ('geometries', [format_geometry(geom) for geom in geometry.geoms]),
+        ))
+    return OrderedDict((
+        ('type', geom_type),
+        ('coordinates', _geometry_coordinates(geometry, geom_type)),
+    ))
+
+
+def _geometry_coordinates(geometry, geom_type):
+    if geometry.is_empty:
+        return ()
+    if geom_type == 'Polygon':
+        return tuple(_geometry_coordinates(ring, 'LinearRing')
+                     for ring in chain((geometry.exterior, ), geometry.interiors))
+    if geom_type.startswith('Multi'):
+        return tuple(_geometry_coordinates(geom, geom_type[5:]) for geom in geometry.geoms)
+    coordinates = round_coordinate_array(np.array(geometry.coords))
+    if geom_type == 'Point':
+        return tuple(coordinates[0].tolist())
+    # build tuples from the columns, the garbage collector has to keep track of every list tolist() returns
+    return tuple(zip(*coordinates.T.tolist()))
+
+
+def round_geometry(geometry):
+    """
+    Round the coordinates of a shapely geometry to two decimals, with the same results as format_geometry().
+    The coordinate arrays are rounded directly, without building GeoJSON coordinate tuples.
+    """
+    if geometry.is_empty:
+        return geometry
+    geom_type = type(geometry).__name__
+    if geom_type.startswith('Multi') or geom_type == 'GeometryCollection':
+        return type(geometry)([round_geometry(geom) for geom in geometry.geoms])
+    if geom_type == 'Polygon':
+        return Polygon(round_coordinate_array(np.array(geometry.exterior.coords)),
+                       [round_coordinate_array(np.array(ring.coords)) for ring in geometry.interiors])
+    coordinates = round_coordinate_array(np.array(geometry.coords))
+    if geom_type == 'Point':
+        return Point(coordinates[0])
+    return type(geometry)(coordinates)
+
+
+def round_coordinate_array(coordinates):
+    """
+    Round a numpy array to two decimals, with the same results as round(value, 2).
+    Values that are close to half a centimeter are rounded one by one, because multiplying them can round them
+    across the boundary, while round() looks at their exact decimal value.
+    """
+    scaled = coordinates * 100
+    result = np.rint(scaled) / 100
+    close_to_half = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    if close_to_half.any():
+        result[close_to_half] = [round(value, 2) for value in coordinates[close_to_half].tolist()]
+    return result
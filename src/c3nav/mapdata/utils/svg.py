@@ -1,8 +1,8 @@
 import re
-import xml.etree.ElementTree as ET
-from itertools import chain
+from xml.sax.saxutils import quoteattr
 
-from shapely.affinity import scale, translate
+import numpy as np
+from shapely.geometry import GeometryCollection, LineString, MultiLineString, MultiPolygon, Polygon
 
 
 class SVGImage:
@@ -11,30 +11,28 @@ class SVGImage:
         self.width = self.right-self.left
         self.height = self.top-self.bottom
         self.scale = scale
-        self.g = ET.Element('g', {})
-        self.defs = ET.Element('defs')
+        self.defs = []
+        self.g = []
         self.def_i = 0
 
-        blur_filter = ET.Element('filter', {'id': 'wallblur'})
-        blur_filter.append(ET.Element('feGaussianBlur',
-                                      {'in': 'SourceGraphic',
-                                       'stdDeviation': str(int(0.7 * self.scale))}))
-        self.defs.append(blur_filter)
-
-    def get_element(self):
-        root = ET.Element('svg', {
-            'width': str(self.width*self.scale),
-            'height': str(self.height*self.scale),
-            'xmlns:svg': 'http://www.w3.org/2000/svg',
-            'xmlns': 'http://www.w3.org/2000/svg',
-            'xmlns:xlink': 'http://www.w3.org/1999/xlink',
-        })
-        root.append(self.defs)
-        root.append(self.g)
-        return root
+        self.defs.append('<filter id="wallblur"><feGaussianBlur in="SourceGraphic" stdDeviation="%d"/></filter>' %
+                         int(0.7 * self.scale))
 
     def get_xml(self):
-        return ET.tostring(self.get_element()).decode()
+        return ''.join(self.iter_xml())
+
+    def iter_xml(self):
+        """
+        Yield the SVG document in chunks, so it can be written incrementally.
+        """
+        yield ('<svg height=%s width=%s xmlns="http://www.w3.org/2000/svg" xmlns:svg="http://www.w3.org/2000/svg" '
+               'xmlns:xlink="http://www.w3.org/1999/xlink">' % (quoteattr(str(self.height * self.scale)),
+                                                                quoteattr(str(self.width * self.scale))))
+        yield '<defs>'
+        yield from self.defs
+        yield '</defs><g>'
+        yield from self.g
+        yield '</g></svg>'
 
     def new_defid(self):
         defid = 's'+str(self.def_i)
@@ -44,73 +42,99 @@ class SVGImage:
     def _trim_decimals(self, data):
         return re.sub(r'([0-9]+)\.0', r'\1', re.sub(r'([0-9]+\.[0-9])[0-9]+', r'\1', data))
 
-    def _create_geometry(self, geometry):
-        geometry = translate(geometry, xoff=0-self.left, yoff=0-self.bottom)
-        geometry = scale(geometry, xfact=1, yfact=-1, origin=(self.width / 2, self.height / 2))
-        geometry = scale(geometry, xfact=self.scale, yfact=self.scale, origin=(0, 0))
-        element = ET.fromstring(self._trim_decimals(geometry.svg(0, '#FFFFFF')))
-        if element.tag != 'g':
-            new_element = ET.Element('g')
-            new_element.append(element)
-            element = new_element
-
-        for elem in chain(element.findall('polyline'), element.findall('path')):
-            elem.attrib.pop('opacity', None)
-            elem.attrib.pop('fill', None)
-            elem.attrib.pop('fill-rule', None)
-            elem.attrib.pop('stroke', None)
-            elem.attrib.pop('stroke-width', None)
-        return element
+    @classmethod
+    def _get_coords(cls, geometry):
+        """
+        Get the coordinate arrays of all rings and lines in this geometry.
+        Points have no area or length, so they are not drawn and have no coordinates here.
+        :return: list of (coordinates, closed) tuples
+        """
+        if isinstance(geometry, Polygon):
+            return [(np.asarray(ring.coords), True) for ring in (geometry.exterior, *geometry.interiors)]
+        if isinstance(geometry, LineString):
+            return [(np.asarray(geometry.coords), False)]
+        if isinstance(geometry, (MultiPolygon, MultiLineString, GeometryCollection)):
+            return sum((cls._get_coords(subgeometry) for subgeometry in geometry.geoms), [])
+        return []
+
+    def _create_path_data(self, geometry):
+        """
+        Create the path data for a geometry.
+        All coordinates are transformed and rounded in one step, closed rings omit their last coordinate.
+        """
+        coords = [(ring_coords[:-1] if closed else ring_coords, closed)
+                  for ring_coords, closed in self._get_coords(geometry) if len(ring_coords)]
+        if not coords:
+            return ''
+
+        values = np.concatenate([ring_coords[:, :2] for ring_coords, closed in coords])
+        values = np.round((values - (self.left, self.top)) * (self.scale, -self.scale), 1) + 0.0
+        values = values.ravel().tolist()
+
+        path = []
+        i = 0
+        for ring_coords, closed in coords:
+            length = len(ring_coords)
+            path.append('M' + ('%.8g,%.8g ' * length)[:-1] % tuple(values[i:i+length*2]) + ('z' if closed else ''))
+            i += length*2
+        return ''.join(path)
+
+    def _create_geometry(self, geometry, attrib='', defid=None):
+        if defid is not None:
+            attrib = ' id=%s%s' % (quoteattr(defid), attrib)
+        return '<path d="%s"%s/>' % (self._create_path_data(geometry), attrib)
 
     def register_geometry(self, geometry, defid=None, as_clip_path=False, comment=None):
         if defid is None:
             defid = self.new_defid()
 
-        element = self._create_geometry(geometry)
-
         if as_clip_path:
-            element.tag = 'clipPath'
-        element.set('id', defid)
-        self.defs.append(element)
+            self.defs.append('<clipPath id=%s>%s</clipPath>' % (quoteattr(defid), self._create_geometry(geometry)))
+        else:
+            self.defs.append(self._create_geometry(geometry, defid=defid))
         return defid
 
     def add_clip_path(self, *geometries, inverted=False, subtract=False, defid=None):
         if defid is None:
             defid = self.new_defid()
 
-        clippath = ET.Element('clipPath', {'id': defid})
-        clippath.append(ET.Element('use', {'xlink:href': '#' + geometries[0]}))
-        self.defs.append(clippath)
+        self.defs.append('<clipPath id=%s><use xlink:href=%s/></clipPath>' % (quoteattr(defid),
+                                                                              quoteattr('#' + geometries[0])))
         return defid
 
     def add_geometry(self, geometry=None, fill_color=None, fill_opacity=None, opacity=None, filter=None,
                      stroke_width=0.0, stroke_color=None, stroke_opacity=None, stroke_linejoin=None, clip_path=None):
-        if geometry is not None:
-            if not geometry:
-                return
-            if isinstance(geometry, str):
-                element = ET.Element('use', {'xlink:href': '#'+geometry})
-            else:
-                element = self._create_geometry(geometry)
-        else:
-            element = ET.Element('rect', {'width': '100%', 'height': '100%'})
-        element.set('fill', fill_color or 'none')
+        attrib = [('fill', fill_color or 'none')]
         if fill_opacity:
-            element.set('fill-opacity', str(fill_opacity)[:4])
+            attrib.append(('fill-opacity', str(fill_opacity)[:4]))
         if stroke_width:
-            element.set('stroke-width', self._trim_decimals(str(stroke_width * self.scale)))
+            attrib.append(('stroke-width', self._trim_decimals(str(stroke_width * self.scale))))
         if stroke_color:
-            element.set('stroke', stroke_color)
+            attrib.append(('stroke', stroke_color))
         if stroke_opacity:
-            element.set('stroke-opacity', str(stroke_opacity)[:4])
+            attrib.append(('stroke-opacity', str(stroke_opacity)[:4]))
         if stroke_linejoin:
-            element.set('stroke-linejoin', stroke_linejoin)
+            attrib.append(('stroke-linejoin', stroke_linejoin))
         if opacity:
-            element.set('opacity', str(opacity)[:4])
+            attrib.append(('opacity', str(opacity)[:4]))
         if filter:
-            element.set('filter', 'url(#'+filter+')')
+            attrib.append(('filter', 'url(#'+filter+')'))
         if clip_path:
-            element.set('clip-path', 'url(#'+clip_path+')')
+            attrib.append(('clip-path', 'url(#'+clip_path+')'))
+        attrib = ''.join(' %s=%s' % (name, quoteattr(value)) for name, value in attrib)
+
+        if geometry is not None:
+            if not geometry:
+                return
+            if isinstance(geometry, str):
+                element = '<use xlink:href=%s%s/>' % (quoteattr('#'+geometry), attrib)
+            else:
+                path_data = self._create_path_data(geometry)
+                if not path_data:
+                    # nothing to draw, e.g. only points
+                    return
+                element = '<path d="%s"%s/>' % (path_data, attrib)
+        else:
+            element = '<rect height="100%%" width="100%%"%s/>' % attrib
 
         self.g.append(element)
-        return element
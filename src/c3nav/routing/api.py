@@ -0,0 +1,61 @@
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from c3nav.mapdata.models.locations import Location, LocationSlug
+from c3nav.routing.cache import ROUTE_ERRORS, get_route_serialized
+from c3nav.routing.exceptions import NotYetRoutable
+from c3nav.routing.point import PointLocation
+from c3nav.routing.utils.access import get_allow_nonpublic
+from c3nav.routing.utils.ctypes import get_ctypes
+
+
+class RoutingViewSet(ViewSet):
+    """
+    Routing API
+    /route/ returns a route, specify ?origin=<location>&destination=<location>
+    locations can be slugs, location ids or coordinates (c:<level id>:<x>:<y> in centimeters).
+    optional: stairs, escalators and elevators (yes, up, down or no), avoid and include (may be given multiple times)
+    either returns {"route": …} or {"error": "noroutefound|alreadythere|notyetroutable"}
+    """
+    @staticmethod
+    def _get_location(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            raise ValidationError(detail={'detail': _('%s is required.') % name})
+
+        if value.startswith('c:'):
+            location = PointLocation.from_location_id(value)
+        else:
+            location = Location.get_by_slug(value, LocationSlug.objects.all())
+            if location is not None:
+                location = location.get_child()
+        if location is None:
+            raise NotFound(detail=_('%s not found.') % name)
+        return location
+
+    @list_route(methods=['get'])
+    def route(self, request, *args, **kwargs):
+        origin = self._get_location(request, 'origin')
+        destination = self._get_location(request, 'destination')
+
+        allowed_ctypes = ('', )
+        allowed_ctypes += get_ctypes('stairs', request.query_params.get('stairs', 'yes'))
+        allowed_ctypes += get_ctypes('escalator', request.query_params.get('escalators', 'yes'))
+        allowed_ctypes += get_ctypes('elevator', request.query_params.get('elevators', 'yes'))
+
+        allow_nonpublic = get_allow_nonpublic(request)
+        avoid = set(request.query_params.getlist('avoid'))
+        include = set(request.query_params.getlist('include'))
+
+        # the graph module pulls in the whole routing stack, only import it when actually routing
+        from c3nav.routing.graph import Graph
+        try:
+            graph = Graph.load()
+        except FileNotFoundError:
+            return Response({'error': ROUTE_ERRORS[NotYetRoutable]})
+
+        return Response(get_route_serialized(graph, origin, destination, allowed_ctypes, allow_nonpublic,
+                                             avoid, include))
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.translation import get_language
+
+from c3nav.mapdata.utils import bus as map_update_bus
+from c3nav.routing.exceptions import AlreadyThere, NoRouteFound, NotYetRoutable
+from c3nav.routing.point import PointLocation
+
+ROUTE_ERRORS = OrderedDict((
+    (NoRouteFound, 'noroutefound'),
+    (AlreadyThere, 'alreadythere'),
+    (NotYetRoutable, 'notyetroutable'),
+))
+
+ROUTE_CACHE_TIMEOUT = 900
+ROUTE_CACHE_SIZE = 256
+ROUTE_LOCK_TIMEOUT = 30
+
+
+def get_location_cache_id(location):
+    """
+    Get an id for a location to use in route cache keys. Coordinates are quantized to the route cache grid,
+    so routes from or to points that are close to each other share a cache entry.
+    """
+    if isinstance(location, PointLocation):
+        grid = settings.ROUTE_CACHE_GRID
+        return 'c:%d:%d:%d' % (location.section.pk, round(location.x / grid), round(location.y / grid))
+    if hasattr(location, 'get_slug'):
+        return location.get_slug()
+    return '%s:%s' % (location._meta.label_lower, location.pk)
+
+
+def get_route_cache_key(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include):
+    """
+    Get the cache key for a route query. Includes the graph version and the current language.
+    """
+    query = (
+        get_location_cache_id(origin),
+        get_location_cache_id(destination),
+        sorted(set(allowed_ctypes)),
+        bool(allow_nonpublic),
+        sorted(set(avoid)),
+        sorted(set(include)),
+        get_language(),
+    )
+    return 'routing:route:%s:%s' % (graph.mtime, hashlib.md5(json.dumps(query).encode()).hexdigest())
+
+
+class RouteCache:
+    """
+    Process-wide cache of described routes for the currently loaded graph.
+    Concurrent identical queries are coalesced, so every route is only computed once.
+    """
+    _routes = OrderedDict()
+    _pending = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_route(cls, graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include):
+        """
+        Get a described route, like graph.get_route() followed by route.describe().
+        Routing errors are cached as well and raised again.
+        """
+        key = get_route_cache_key(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include)
+        while True:
+            with cls._lock:
+                result = cls._routes.get(key, None)
+                if result is not None:
+                    cls._routes.move_to_end(key)
+                    return cls._unpack(result)
+
+                event = cls._pending.get(key, None)
+                compute = event is None
+                if compute:
+                    event = cls._pending[key] = threading.Event()
+
+            if not compute:
+                # another thread is already computing this route, retry when it is done
+                event.wait(ROUTE_LOCK_TIMEOUT)
+                continue
+
+            try:
+                result = cls._compute(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include)
+                with cls._lock:
+                    cls._routes[key] = result
+                    while len(cls._routes) > ROUTE_CACHE_SIZE:
+                        cls._routes.popitem(last=False)
+            finally:
+                with cls._lock:
+                    cls._pending.pop(key)
+                event.set()
+            return cls._unpack(result)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._routes.clear()
+
+    @staticmethod
+    def _compute(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include):
+        try:
+            route = graph.get_route(origin, destination, allowed_ctypes, allow_nonpublic=allow_nonpublic,
+                                    avoid=avoid, include=include)
+        except tuple(ROUTE_ERRORS.keys()) as e:
+            return None, e.__class__
+        route.describe(allowed_ctypes)
+        return route, None
+
+    @staticmethod
+    def _unpack(result):
+        route, error = result
+        if error is not None:
+            raise error
+        return route
+
+
+@map_update_bus.subscribe
+def forget_routes(map_update_pk):
+    # described routes contain titles and other map data that may have changed
+    RouteCache.clear()
+
+
+def get_route_serialized(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include):
+    """
+    Get a serialized described route or routing error, shared between all processes.
+    :return: dictionary with either a route or an error code
+    """
+    key = get_route_cache_key(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    # only one process computes a route, the others wait for its result
+    locked = cache.add(key+':lock', True, ROUTE_LOCK_TIMEOUT)
+    if not locked:
+        timeout = time.monotonic() + ROUTE_LOCK_TIMEOUT
+        while time.monotonic() < timeout:
+            time.sleep(0.05)
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+    try:
+        try:
+            route = RouteCache.get_route(graph, origin, destination, allowed_ctypes, allow_nonpublic, avoid, include)
+        except tuple(ROUTE_ERRORS.keys()) as e:
+            result = {'error': ROUTE_ERRORS[e.__class__]}
+        else:
+            # evaluate lazy translations now, the result must not depend on the language of other requests
+            result = {'route': json.loads(json.dumps(route.serialize(), cls=DjangoJSONEncoder))}
+        cache.set(key, result, ROUTE_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(key+':lock')
+    return result
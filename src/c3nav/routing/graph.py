@@ -9,12 +9,13 @@ from django.conf import settings
 from scipy.sparse.csgraph._shortest_path import shortest_path
 from scipy.sparse.csgraph._tools import csgraph_from_dense
 
+from c3nav.mapdata.models import Source
 from c3nav.mapdata.models.level import Level
 from c3nav.mapdata.models.locations import Location, LocationGroup
 from c3nav.routing.connection import GraphConnection
 from c3nav.routing.exceptions import AlreadyThere, NoRouteFound, NotYetRoutable
 from c3nav.routing.level import GraphLevel
-from c3nav.routing.point import GraphPoint
+from c3nav.routing.point import GraphPoint, PointLocation
 from c3nav.routing.route import NoRoute, Route
 from c3nav.routing.routesegments import (GraphRouteSegment, LevelRouteSegment, RoomRouteSegment, SegmentRoute,
                                          SegmentRouteWrapper)
@@ -24,6 +25,7 @@ class Graph:
     graph_cached = None
     graph_cached_mtime = None
     default_filename = os.path.join(settings.DATA_DIR, 'graph.pickle')
+    svg_scale = 6
 
     def __init__(self, mtime=None):
         self.mtime = mtime
@@ -180,8 +182,19 @@ class Graph:
         for i, point in enumerate(graph.points):
             point.i = i
 
+        graph.create_point_arrays()
+
         return graph
 
+    def create_point_arrays(self):
+        """
+        Create arrays with the coordinates, svg render coordinates and levels of all points, indexed by point.i.
+        """
+        (bottom, left), (top, right) = Source.max_bounds()
+        self.points_xy = np.array(tuple((point.x, point.y) for point in self.points), dtype=float).reshape((-1, 2))
+        self.points_svg_xy = (self.points_xy - (left, top)) * (self.svg_scale, -self.svg_scale)
+        self.points_level = np.array(tuple(point.level for point in self.points), dtype=object)
+
     @classmethod
     def load(cls, filename=None):
         do_cache = False
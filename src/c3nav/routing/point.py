@@ -2,6 +2,7 @@ import numpy as np
 from django.conf import settings
 from django.utils.functional import cached_property
 
+from c3nav.mapdata.models import Level
 from c3nav.routing.connection import GraphConnection
 
 
@@ -44,3 +45,35 @@ class GraphPoint():
 
     def __repr__(self):
         return '<GraphPoint x=%f y=%f room=%s>' % (self.x, self.y, (id(self.room) if self.room else None))
+
+
+class PointLocation:
+    """
+    A location given by coordinates on a level, e.g. from a click on the map.
+    Its location id is c:<level id>:<x>:<y> with coordinates in centimeters.
+    """
+    def __init__(self, section, x, y):
+        self.section = section
+        self.x = x
+        self.y = y
+
+    @property
+    def location_id(self):
+        return 'c:%d:%d:%d' % (self.section.pk, self.x*100, self.y*100)
+
+    @classmethod
+    def from_location_id(cls, location_id):
+        """
+        Parse a location id. Returns None if it is invalid or the level does not exist.
+        """
+        code, level, x, y = (location_id.split(':') + [''] * 4)[:4]
+        if code != 'c' or not level.isdigit() or not x.lstrip('-').isdigit() or not y.lstrip('-').isdigit():
+            return None
+        try:
+            level = Level.objects.get(pk=level)
+        except Level.DoesNotExist:
+            return None
+        return cls(level, int(x)/100, int(y)/100)
+
+    def __repr__(self):
+        return '<PointLocation %s>' % self.location_id
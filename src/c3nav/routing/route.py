@@ -5,6 +5,31 @@ from collections import OrderedDict
 import numpy as np
 from django.utils.translation import ugettext_lazy as _
 
+CTYPE_DESCRIPTIONS = {
+    'stairs_up': _('Go up the stairs.'),
+    'stairs_down': _('Go down the stairs.'),
+    'escalator_up': _('Take the escalator upwards.'),
+    'escalator_down': _('Take the escalator downwards.'),
+    'elevator_up': _('Take the elevator upwards.'),
+    'elevator_down': _('Take the elevator downwards.')
+}
+
+DOOR_DESCRIPTIONS = {
+    '': _('Go through the door.'),
+    'left': _('Go through the door on the left.'),
+    'right': _('Go through the door on the right.'),
+}
+
+TURNING_DESCRIPTIONS = {
+    '': _('Continue for %(d).1f meters.'),
+    'light_left': _('Turn light to the left and continue for %(d).1f meters.'),
+    'light_right': _('Turn light to the right and continue for %(d).1f meters.'),
+    'left': _('Turn left and continue for %(d).1f meters.'),
+    'right': _('Turn right and continue for %(d).1f meters.'),
+}
+
+TURNINGS = np.array(('', 'light_right', 'light_left', 'right', 'left'))
+
 
 class Route:
     def __init__(self, connections, distance=None):
@@ -76,6 +101,7 @@ class Route:
         self.create_routeparts()
 
         for i, routepart in enumerate(self.routeparts):
+            routepart.calculate_turnings()
             for j, line in enumerate(routepart.lines):
                 from_room = line.from_point.room
                 to_room = line.to_point.room
@@ -83,20 +109,6 @@ class Route:
                 if i and not j:
                     line.ignore = True
 
-                line.turning = ''
-
-                if j:
-                    line.angle_change = (line.angle - routepart.lines[j - 1].angle + 180) % 360 - 180
-
-                    if 20 < line.angle_change <= 75:
-                        line.turning = 'light_right'
-                    elif -75 <= line.angle_change < -20:
-                        line.turning = 'light_left'
-                    elif 75 < line.angle_change:
-                        line.turning = 'right'
-                    elif line.angle_change < -75:
-                        line.turning = 'left'
-
                 line.icon = line.ctype or line.turning
 
                 distance = line.distance
@@ -112,14 +124,7 @@ class Route:
                         line.title, line.description = self.describe_point(line.to_point)
 
                 elif line.ctype_main in ('stairs', 'escalator', 'elevator'):
-                    line.description = {
-                        'stairs_up': _('Go up the stairs.'),
-                        'stairs_down': _('Go down the stairs.'),
-                        'escalator_up': _('Take the escalator upwards.'),
-                        'escalator_down': _('Take the escalator downwards.'),
-                        'elevator_up': _('Take the elevator upwards.'),
-                        'elevator_down': _('Take the elevator downwards.')
-                    }.get(line.ctype)
+                    line.description = CTYPE_DESCRIPTIONS.get(line.ctype)
 
                     if line.ctype_main == 'elevator':
                         if from_room is None or (to_room is None and from_room.level.level != routepart.level):
@@ -143,10 +148,7 @@ class Route:
                         if routepart.lines[j+2].ctype_main == 'elevator':
                             line.ignore = True
 
-                    line.description = {
-                        'left': _('Go through the door on the left.'),
-                        'right': _('Go through the door on the right.'),
-                    }.get(line.turning.split('_')[-1], _('Go through the door.'))
+                    line.description = DOOR_DESCRIPTIONS.get(line.turning.split('_')[-1], DOOR_DESCRIPTIONS[''])
 
                     line.arrow = False
 
@@ -174,12 +176,7 @@ class Route:
                                 line.turning = last.turning
                                 distance += last.desc_distance
 
-                    line.description = {
-                        'light_left': _('Turn light to the left and continue for %(d).1f meters.') % {'d': distance},
-                        'light_right': _('Turn light to the right and continue for %(d).1f meters.') % {'d': distance},
-                        'left': _('Turn left and continue for %(d).1f meters.') % {'d': distance},
-                        'right': _('Turn right and continue for %(d).1f meters.') % {'d': distance}
-                    }.get(line.turning, _('Continue for %(d).1f meters.') % {'d': distance})
+                    line.description = TURNING_DESCRIPTIONS[line.turning] % {'d': distance}
 
                     if distance < 0.2:
                         line.ignore = True
@@ -238,23 +235,54 @@ class RoutePart:
             ('lines', [line.serialize() for line in self.lines]),
         ))
 
+    def calculate_turnings(self):
+        """
+        Calculate angle, angle change and turning of all lines at once.
+        """
+        if not self.lines:
+            return
+
+        from_xy = np.array(tuple(line.from_point.xy for line in self.lines))
+        to_xy = np.array(tuple(line.to_point.xy for line in self.lines))
+        delta = to_xy - from_xy
+        angles = np.degrees(np.arctan2(-delta[:, 1], delta[:, 0])) % 360
+
+        angle_changes = np.empty_like(angles)
+        angle_changes[0] = 0
+        angle_changes[1:] = (angles[1:] - angles[:-1] + 180) % 360 - 180
+
+        turnings = TURNINGS[np.select((
+            (20 < angle_changes) & (angle_changes <= 75),
+            (-75 <= angle_changes) & (angle_changes < -20),
+            75 < angle_changes,
+            angle_changes < -75,
+        ), (1, 2, 3, 4), 0)]
+
+        for line, angle, angle_change, turning in zip(self.lines, angles.tolist(), angle_changes.tolist(),
+                                                      turnings.tolist()):
+            line.angle = angle
+            line.angle_change = angle_change
+            line.turning = turning
+        self.lines[0].angle_change = None
+
     def render_svg_coordinates(self):
-        svg_width, svg_height = get_dimensions()
+        graph = self.graphlevel.graph
+        points_i = np.array((self.lines[0].from_point.i, ) + tuple(line.to_point.i for line in self.lines))
+        svg_xy = graph.points_svg_xy[points_i]
 
-        points = (self.lines[0].from_point,) + tuple(connection.to_point for connection in self.lines)
-        for point in points:
-            point.svg_x = point.x * 6
-            point.svg_y = (svg_height - point.y) * 6
+        for line, (x1, y1), (x2, y2) in zip(self.lines, svg_xy[:-1].tolist(), svg_xy[1:].tolist()):
+            line.svg_x1, line.svg_y1, line.svg_x2, line.svg_y2 = x1, y1, x2, y2
 
-        x, y = zip(*((point.svg_x, point.svg_y) for point in points if point.level == self.graphlevel))
+        level_svg_xy = svg_xy[graph.points_level[points_i] == self.graphlevel]
+        (min_x, min_y), (max_x, max_y) = level_svg_xy.min(axis=0).tolist(), level_svg_xy.max(axis=0).tolist()
 
         self.distance = sum(connection.distance for connection in self.lines)
 
         # bounds for rendering
-        self.svg_min_x = min(x) - 20
-        self.svg_max_x = max(x) + 20
-        self.svg_min_y = min(y) - 20
-        self.svg_max_y = max(y) + 20
+        self.svg_min_x = min_x - 20
+        self.svg_max_x = max_x + 20
+        self.svg_min_y = min_y - 20
+        self.svg_max_y = max_y + 20
 
         svg_width = self.svg_max_x - self.svg_min_x
         svg_height = self.svg_max_y - self.svg_min_y
@@ -274,20 +302,38 @@ class RoutePart:
         return repr(self.__dict__)
 
 
+_ctype_parts = {}
+
+
+def split_ctype(ctype):
+    """
+    Split a connection type into its main type and direction, e.g. stairs_up into stairs and up.
+    """
+    try:
+        return _ctype_parts[ctype]
+    except KeyError:
+        pass
+    result = (ctype.split('_')[0], ctype.split('_')[-1])
+    _ctype_parts[ctype] = result
+    return result
+
+
 class RouteLine:
     def __init__(self, connection):
         self.from_point = connection.from_point
         self.to_point = connection.to_point
         self.distance = connection.distance
         self.ctype = connection.ctype
-        self.angle = connection.angle
+        self.angle = None
+
+        self.ctype_main, self.ctype_direction = split_ctype(self.ctype)
 
-        self.ctype_main = self.ctype.split('_')[0]
-        self.ctype_direction = self.ctype.split('_')[-1]
+        self.svg_x1 = self.svg_y1 = self.svg_x2 = self.svg_y2 = None
 
         self.ignore = False
         self.arrow = None
         self.angle_change = None
+        self.turning = ''
         self.can_merge_to_next = False
 
         self.icon = None
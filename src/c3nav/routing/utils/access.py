@@ -0,0 +1,6 @@
+def get_allow_nonpublic(request):
+    """
+    whether routes for this request may lead through non-public areas.
+    uses the same full access as showing non-public map data, see c3nav.mapdata.middleware
+    """
+    return bool(request.c3nav_full_access)
@@ -0,0 +1,26 @@
+ctype_mapping = {
+    'yes': ('up', 'down'),
+    'up': ('up', ),
+    'down': ('down', ),
+    'no': ()
+}
+
+
+def get_ctypes(prefix, value):
+    """
+    get the allowed connection types for a setting like stairs=up
+    :param prefix: connection type prefix, e.g. stairs, escalator or elevator
+    :param value: yes, up, down or no, anything else is treated like yes
+    :return: tuple of connection types, e.g. ('stairs_up', )
+    """
+    return tuple((prefix+'_'+direction) for direction in ctype_mapping.get(value, ('up', 'down')))
+
+
+def reverse_ctypes(ctypes, name):
+    """
+    get the setting value (yes, up, down or no) for allowed connection types, reverses get_ctypes()
+    """
+    if name+'_up' in ctypes:
+        return 'yes' if name + '_down' in ctypes else 'up'
+    else:
+        return 'down' if name + '_down' in ctypes else 'no'
@@ -54,6 +54,8 @@ else:
 debug_fallback = "runserver" in sys.argv
 DEBUG = config.getboolean('django', 'debug', fallback=debug_fallback)
 RENDER_SCALE = float(config.get('c3nav', 'render_scale', fallback=20.0))
+RENDER_PROCESSES = config.getint('c3nav', 'render_processes', fallback=os.cpu_count())
+ROUTE_CACHE_GRID = float(config.get('c3nav', 'route_cache_grid', fallback=0.5))
 
 db_backend = config.get('database', 'backend', fallback='sqlite3')
 DATABASES = {
@@ -167,6 +169,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
+    'c3nav.mapdata.middleware.AccessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -1,9 +1,11 @@
 from django.conf.urls import url
 
-from c3nav.site.views import main, map_image, qr_code
+from c3nav.site.views import main, map_image, map_tile, qr_code
 
 urlpatterns = [
     url(r'^map/(?P<level>[a-z0-9-_:]+)/(?P<area>[a-z0-9-_:]+).png$', map_image, name='site.level_image'),
+    url(r'^map/(?P<level>\d+)/(?P<access>public|full)/(?P<zoom>-?\d+)/(?P<x>\d+)/(?P<y>\d+).png$', map_tile,
+        name='site.level_tile'),
     url(r'^qr/(?P<location>[a-z0-9-_:]+).png$', qr_code, name='site.qr'),
     url(r'^l/(?P<location>[a-z0-9-_:]+)/$', main, name='site.location'),
     url(r'^o/(?P<origin>[a-z0-9-_:]+)/$', main, name='site.origin'),
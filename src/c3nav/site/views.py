@@ -8,25 +8,12 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 
+from c3nav.mapdata.models import MapUpdate
 from c3nav.mapdata.models.level import Level
-
-ctype_mapping = {
-    'yes': ('up', 'down'),
-    'up': ('up', ),
-    'down': ('down', ),
-    'no': ()
-}
-
-
-def get_ctypes(prefix, value):
-    return tuple((prefix+'_'+direction) for direction in ctype_mapping.get(value, ('up', 'down')))
-
-
-def reverse_ctypes(ctypes, name):
-    if name+'_up' in ctypes:
-        return 'yes' if name + '_down' in ctypes else 'up'
-    else:
-        return 'down' if name + '_down' in ctypes else 'no'
+from c3nav.mapdata.render.tiles import get_level_tile
+from c3nav.routing.cache import RouteCache, get_route_serialized
+from c3nav.routing.utils.access import get_allow_nonpublic
+from c3nav.routing.utils.ctypes import get_ctypes, reverse_ctypes
 
 
 def get_location_or_404(request, location):
@@ -177,7 +164,8 @@ def main(request, location=None, origin=None, destination=None):
     elevators = reverse_ctypes(allowed_ctypes, 'elevator')
 
     includables, avoidables = get_includables_avoidables(request)
-    allow_nonpublic, include, avoid = parse_include_avoid(request, include, avoid)
+    include, avoid = parse_include_avoid(request, include, avoid)[1:]
+    allow_nonpublic = get_allow_nonpublic(request)
 
     if request.method == 'POST':
         save_settings = request.POST.get('save_settings', '') == '1'
@@ -196,10 +184,14 @@ def main(request, location=None, origin=None, destination=None):
     # routing
     if request.method == 'POST' and origin and destination:
         graph = Graph.load()
+        route_query = (graph, origin, destination, allowed_ctypes, allow_nonpublic,
+                       avoid-set(':public'), include-set(':nonpublic'))
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse(get_route_serialized(*route_query))
 
         try:
-            route = graph.get_route(origin, destination, allowed_ctypes, allow_nonpublic=allow_nonpublic,
-                                    avoid=avoid-set(':public'), include=include-set(':nonpublic'))
+            route = RouteCache.get_route(*route_query)
         except NoRouteFound:
             ctx.update({'error': 'noroutefound'})
         except AlreadyThere:
@@ -207,7 +199,6 @@ def main(request, location=None, origin=None, destination=None):
         except NotYetRoutable:
             ctx.update({'error': 'notyetroutable'})
         else:
-            route.describe(allowed_ctypes)
             ctx.update({'route': route})
 
     if request.GET.get('format') == 'json':
@@ -259,3 +250,26 @@ def map_image(request, area, level):
     response['ETag'] = etag
     response['Cache-Control'] = 'no-cache'
     return response
+
+
+def map_tile(request, level, access, zoom, x, y):
+    level = get_object_or_404(Level, pk=level)
+    if access == 'full' and not request.c3nav_full_access:
+        raise Http404
+
+    cache_key = MapUpdate.cache_key()
+    etag = '"%s"' % cache_key
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        if if_none_match == etag:
+            return HttpResponseNotModified()
+
+    data = get_level_tile(level, access, int(zoom), int(x), int(y), cache_key)
+    if data is None:
+        raise Http404
+
+    response = HttpResponse(data, content_type='image/png')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response